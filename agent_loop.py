@@ -1,176 +1,206 @@
+import asyncio
+import hashlib
+import logging
 import re
 import os
+import threading
 import time
-from dotenv import load_dotenv
-from langchain_ollama import OllamaLLM
-from tools import get_weather, get_weather_forecast, web_search
+from collections import Counter
+from typing import Callable, Iterator
+import config  # noqa: F401
+from cache import TieredCache
+from cascade import Cascade
+from gazetteer import City, get_gazetteer
+from llm_client import (
+    MODEL_NAME, SMALL_MODEL_NAME, WARMUP_ON_START, get_llm, llm_astream, llm_stream, start_warmup,
+)
+from routing import clip_question, scan_question
+from scheduler import LLMBusy, LLMScheduler
+from singleflight import SingleFlight
+from tools import (
+    get_weather, get_weather_async, get_weather_forecast, get_weather_forecast_async,
+    web_search, web_search_async, PREWARM_ON_START, SEARCH_FLIGHTS, SearchResult, prewarm_connections,
+)
+from weather import WeatherReport
 
-load_dotenv()
-MODEL_NAME = os.getenv("MODEL_NAME", "mistral-openorca")
-llm_pipe = OllamaLLM(model=MODEL_NAME)
+logger = logging.getLogger(__name__)
+
+def __getattr__(name: str):
+    # `agent_loop.llm_pipe` keeps working but no longer builds the client at import
+    if name == "llm_pipe":
+        return get_llm()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # --- Category Detection ---
+# Keyword lists live in routing.py; each question is scanned once by scan_question.
 def detect_category(question: str) -> str:
-    q = question.lower()
-    if any(word in q for word in [
-        "weather", "temperature", "humidity", "rain", "forecast", "climate", "wind", "sunny", "cloudy", "storm", "snow"
-    ]):
+    f = scan_question(question)
+    if f.has("weather_category"):
         return "Weather"
-    if any(word in q for word in [
-        "ipl", "cricket", "football", "soccer", "tennis", "nba", "nfl", "fifa", "world cup", "sports", "score", "match", "player", "tournament"
-    ]):
+    if f.has("sports"):
         return "Sports"
-    if any(word in q for word in [
-        "prime minister", "president", "government", "election", "vote", "parliament", "politics", "minister", "mla", "mp", "political", "party"
-    ]):
+    if f.has("politics"):
         return "Politics"
-    if any(word in q for word in [
-        "history", "science", "math", "who", "what", "when", "where", "why", "how", "population", "country", "general knowledge"
-    ]):
+    if f.has("general_knowledge"):
         return "General Knowledge"
     return "Other"
 
 # --- Flexible Weather Forecast Intent Detection, including sunny, cloudy, windy ---
+WEATHER_INTENTS = ("rain", "sunny", "cloudy", "windy", "snow")
+
 def get_weather_intent(question: str) -> str | None:
-    q = question.lower()
-    # Rain intent
-    if (
-        ("rain" in q and any(t in q for t in ["today", "tomorrow", "tonight", "now"]))
-        or re.search(r"(gonna|going to) rain", q)
-        or re.search(r"will it rain", q)
-        or re.search(r"chance of rain", q)
-        or re.search(r"rain expected", q)
-        or re.search(r"raining today", q)
-        or re.search(r"precipitation", q)
-    ):
-        return "rain"
-    # Sunny intent
-    if (
-        ("sunny" in q and any(t in q for t in ["today", "tomorrow", "tonight", "now"]))
-        or re.search(r"(gonna|going to) be sunny", q)
-        or re.search(r"will it be sunny", q)
-        or re.search(r"sunny expected", q)
-        or re.search(r"clear skies", q)
-    ):
-        return "sunny"
-    # Cloudy intent
-    if (
-        ("cloudy" in q and any(t in q for t in ["today", "tomorrow", "tonight", "now"]))
-        or re.search(r"(gonna|going to) be cloudy", q)
-        or re.search(r"will it be cloudy", q)
-        or re.search(r"cloudy expected", q)
-        or re.search(r"overcast", q)
-        or re.search(r"clouds", q)
-    ):
-        return "cloudy"
-    # Windy intent
-    if (
-        ("windy" in q and any(t in q for t in ["today", "tomorrow", "tonight", "now"]))
-        or re.search(r"(gonna|going to) be windy", q)
-        or re.search(r"will it be windy", q)
-        or re.search(r"windy expected", q)
-        or re.search(r"strong winds", q)
-        or re.search(r"gusty", q)
-        or re.search(r"wind speed", q)
-    ):
-        return "windy"
-    # Snow intent
-    if (
-        ("snow" in q and any(t in q for t in ["today", "tomorrow", "tonight", "now"]))
-        or re.search(r"(gonna|going to) snow", q)
-        or re.search(r"will it snow", q)
-        or re.search(r"chance of snow", q)
-        or re.search(r"snow expected", q)
-    ):
-        return "snow"
+    f = scan_question(question)
+    for intent in WEATHER_INTENTS:
+        # "<word>" with today/tomorrow/tonight/now, or an explicit phrase like "will it rain"
+        if (f.has(f"{intent}_word") and f.has("intent_time")) or f.has(f"{intent}_intent"):
+            return intent
     return None
 
-def answer_weather_forecast(city: str, intent: str) -> str:
-    forecast = get_weather_forecast(city)
-    forecast_l = forecast.lower()
-    if intent == "rain":
-        if any(word in forecast_l for word in ["rain", "showers", "drizzle", "thunder"]):
-            return f"Yes, rain is expected today in {city}. {forecast}"
-        else:
-            return f"No, rain is not expected today in {city}. {forecast}"
-    if intent == "sunny":
-        if any(word in forecast_l for word in ["sunny", "clear"]):
-            return f"Yes, it will be sunny today in {city}. {forecast}"
-        else:
-            return f"No, it will not be sunny today in {city}. {forecast}"
-    if intent == "cloudy":
-        if any(word in forecast_l for word in ["cloudy", "overcast", "clouds"]):
-            return f"Yes, it will be cloudy today in {city}. {forecast}"
-        else:
-            return f"No, it will not be cloudy today in {city}. {forecast}"
-    if intent == "windy":
-        if any(word in forecast_l for word in ["windy", "strong winds", "gusty"]):
-            return f"Yes, it will be windy today in {city}. {forecast}"
-        else:
-            return f"No, it will not be windy today in {city}. {forecast}"
-    if intent == "snow":
-        if any(word in forecast_l for word in ["snow", "blizzard"]):
-            return f"Yes, snow is expected today in {city}. {forecast}"
-        else:
-            return f"No, snow is not expected today in {city}. {forecast}"
-    return forecast
+# Yes/no lead sentence for each intent; the forecast itself follows it
+INTENT_VERDICTS = {
+    "rain": ("Yes, rain is expected today in {city}.", "No, rain is not expected today in {city}."),
+    "sunny": ("Yes, it will be sunny today in {city}.", "No, it will not be sunny today in {city}."),
+    "cloudy": ("Yes, it will be cloudy today in {city}.", "No, it will not be cloudy today in {city}."),
+    "windy": ("Yes, it will be windy today in {city}.", "No, it will not be windy today in {city}."),
+    "snow": ("Yes, snow is expected today in {city}.", "No, snow is not expected today in {city}."),
+}
+
+def weather_verdict(report: WeatherReport, intent: str) -> str:
+    if not report or intent not in INTENT_VERDICTS:
+        return ""
+    yes, no = INTENT_VERDICTS[intent]
+    return (yes if report.expects(intent) else no).format(city=report.city)
+
+def _weather_answer(plan: dict, report: WeatherReport, intent: str | None = None) -> str:
+    """Answer text for a weather report; plan["weather"] / plan["markdown"] keep the record and its Markdown."""
+    verdict = weather_verdict(report, intent) if intent else ""
+    plan["weather"] = report
+    plan["markdown"] = f"{verdict}\n\n{report.to_markdown()}" if verdict else report.to_markdown()
+    return f"{verdict} {report.to_text()}" if verdict else report.to_text()
+
+def answer_weather_forecast(city: "str | City", intent: str) -> str:
+    return _weather_answer({}, get_weather_forecast(city), intent)
+
+async def answer_weather_forecast_async(city: "str | City", intent: str) -> str:
+    return _weather_answer({}, await get_weather_forecast_async(city), intent)
 
 def is_weather_related(question: str) -> bool:
-    keywords = [
-        "weather", "temperature", "humidity", "rain", "wind", "forecast",
-        "sunny", "cloudy", "storm", "snow", "precipitation", "climate"
-    ]
-    return any(word in question.lower() for word in keywords)
+    return scan_question(question).has("weather")
 
 def is_time_sensitive(question: str) -> bool:
-    q = question.lower()
-    if re.search(r"\b(19|20)\d{2}\b", q):
-        return True
-    keywords = [
-        "who won", "winner", "final", "score", "beat", "defeat", "defeated",
-        "trophy", "title", "champion", "match", "fixture", "result",
-        "ipl", "fifa", "world cup", "uefa", "olympics", "nba", "nfl", "mlb", "nhl", "grand slam",
-        "nobel", "oscars", "academy awards", "emmys", "grammys", "ballon d'or", "golden globes",
-        "president", "prime minister", "chief minister", "current", "mla", "mp", "member of parliament",
-        "election", "vote", "polls"
-    ]
-    return any(term in q for term in keywords)
-
-def extract_city(question: str) -> str | None:
-    q = question.lower()
-    # Try to find "in <city>", "for <city>", or "of <city>"
-    m = re.search(r"\b(?:in|for|of)\s+([a-zA-Z\s\-\.]+)", q)
-    if m:
-        city = m.group(1)
+    f = scan_question(question)
+    return f.has("year") or f.has("team_won") or f.has("time_sensitive")
+
+# "Who is/was <Name>": capitalised words, allowing particles like "da" or "van" in between
+_NAME_WORD = r"[A-Z][\w.'\-]*"
+_WHO_IS_NAME = re.compile(
+    rf"(?i:who\s+(?:is|was))\s+({_NAME_WORD}(?:\s+(?:(?:da|de|del|der|di|du|la|le|van|von|bin|al)\s+)?{_NAME_WORD}){{0,4}})"
+)
+
+def who_is_name(question: str) -> str | None:
+    """
+    The name in "Who is Narendra Modi?", which search answers from Wikipedia or
+    the knowledge graph without the LLM. None for roles ("who is the
+    president of ...") and lower-case subjects, which stay with their route.
+    """
+    m = _WHO_IS_NAME.fullmatch(clip_question(question).strip().rstrip("?").rstrip())
+    if m is None or re.match(r"(?:the|a|an)\s", m.group(1), re.I) or is_time_sensitive(m.group(1)):
+        return None
+    return m.group(1)
+
+# When no gazetteer city matches, a city name guessed after "in"/"for" goes to the
+# weather tools to geocode if the question capitalises it ("weather in Cambridge").
+# CITY_FALLBACK=1 also geocodes lower-case guesses, which are less often cities.
+CITY_FALLBACK = os.getenv("CITY_FALLBACK", "0") == "1"
+
+def extract_city(question: str) -> City | None:
+    """
+    The city a weather question is about. Gazetteer names and aliases come back
+    canonical with coordinates ("bombay" -> Mumbai), misspelled ones corrected
+    ("chenai" -> Chennai); anything else falls back to the "in <city>" guess,
+    returned by name only for the weather tools to geocode.
+    """
+    question = clip_question(question)
+    gazetteer = get_gazetteer()
+    city = gazetteer.find(question) or gazetteer.find_fuzzy(question)
+    if city is not None:
+        return city
+    name = _guess_city_name(question)
+    if name and (CITY_FALLBACK or _written_as_name(question, name)):
+        return City(name)
+    return None
+
+def _written_as_name(question: str, name: str) -> bool:
+    # The title-cased guess appears as is in the question ("in Nice today", not "in nice today")
+    pattern = r"\b" + r"\s+".join(map(re.escape, name.split())) + r"(?!\w)"
+    return re.search(pattern, question) is not None
+
+# Words; any other character comes out as "", which ends a city name ("in pune, today")
+_CITY_TOKEN = re.compile(r"([a-z][a-z.\-]*)|[^a-z\s]")
+_CITY_CUES = frozenset({"in", "for", "of"})
+_CITY_STOP = _CITY_CUES | {"today", "tomorrow", "tonight", "now", "this", "next", "week"}
+# A guess made only of these ("my area", "the city", "here") names no place to geocode
+_CITY_VAGUE = frozenset({
+    "my", "our", "your", "his", "her", "their", "the", "a", "an", "this", "that", "these", "those", "it", "me", "us",
+    "i", "we", "you", "here", "there", "where", "around", "near", "nearby", "local", "current", "same", "whole",
+    "area", "city", "town", "village", "place", "location", "region", "neighborhood", "neighbourhood", "country",
+    "state", "world", "outside", "general",
+})
+# Reading back from "weather", a name also ends at the question's own words ("what is the weather")
+_CITY_BEFORE_STOP = _CITY_STOP | _CITY_VAGUE | {"what", "whats", "how", "hows", "is", "s", "was", "will", "be", "like"}
+
+def _guess_city_name(question: str) -> str | None:
+    """
+    "<city>" after the first "in"/"for"/"of", else after "forecast [in]", else
+    right before "weather". One tokenizer pass; a name is a run of words that
+    stops at punctuation, a digit, another cue or a time word.
+    """
+    tokens = _CITY_TOKEN.findall(question.lower())
+    words: list[str] = []
+    for i, token in enumerate(tokens[:-1]):
+        if token in _CITY_CUES and tokens[i + 1]:
+            words = _city_run(tokens, i + 1, 1)
+            break
     else:
-        # Try to catch patterns like "weather forecast <city>"
-        m2 = re.search(r"forecast(?:\s+in)?\s+([a-zA-Z\s\-\.]+)", q)
-        if m2:
-            city = m2.group(1)
-        else:
-            # Try to catch patterns like "<city> weather"
-            m3 = re.search(r"([a-zA-Z\s\-\.]+)\s+weather", q)
-            if m3:
-                city = m3.group(1)
-            else:
-                return None
-    # Remove leading prepositions and common time words
-    city = re.sub(r"^(in|for|of)\s+", "", city, flags=re.I)
-    city = re.sub(r"\b(this week|today|tomorrow|tonight|now|next week|week)\b", "", city, flags=re.I)
-    city = city.strip(" ,.-")
-    # Final cleanup: only allow letters, spaces, hyphens, dots
-    city = re.sub(r"[^a-zA-Z\s\-\.]", "", city)
-    if 1 <= len(city) <= 64:
+        if "forecast" in tokens:
+            i = tokens.index("forecast") + 1
+            words = _city_run(tokens, i + (i < len(tokens) and tokens[i] == "in"), 1)
+        elif "weather" in tokens:
+            words = _city_run(tokens, tokens.index("weather") - 1, -1, _CITY_BEFORE_STOP)[::-1]
+    city = " ".join(words).strip(" ,.-")
+    if 1 <= len(city) <= 64 and not _CITY_VAGUE.issuperset(city.split()):
         return city.title()
     return None
 
+def _city_run(tokens: list[str], i: int, step: int, stop: frozenset = _CITY_STOP) -> list[str]:
+    # Words from tokens[i] onwards (step 1) or backwards (step -1) up to the first stop
+    words = []
+    while 0 <= i < len(tokens) and tokens[i] and tokens[i] not in stop and len(words) < 8:
+        words.append(tokens[i])
+        i += step
+    return words
+
+_YEAR = re.compile(r"\d{4}")
+
+def _who_won(low: str) -> tuple[str, str] | None:
+    """(event, year) for "who won [the] <event> in <year>", scanning the words once."""
+    words = low.split()
+    for i in range(len(words) - 1):
+        if words[i].endswith("who") and words[i + 1] == "won":
+            start = i + 2 + (i + 2 < len(words) - 1 and words[i + 2] == "the")
+            for j in range(start + 1, len(words) - 1):
+                m = _YEAR.match(words[j + 1])
+                if words[j] == "in" and m:
+                    return " ".join(words[start:j]), m.group()
+            return None
+    return None
+
 def get_best_query(user_input: str) -> str:
-    q = user_input.strip()
+    q = clip_question(user_input.strip())
     low = q.lower()
-    m = re.search(r"who\s+won\s+(the\s+)?(.+?)\s+in\s+(\d{4})\??", low)
+    m = _who_won(low)
     if m:
-        event = m.group(2)
-        year = m.group(3)
+        event, year = m
         if "ipl" in event:
             return f"IPL {year} winner"
         if "world cup" in event and "fifa" not in event:
@@ -212,17 +242,162 @@ COMPOSE_PROMPT = (
     "Answer:"
 )
 
-def llm_direct_answer(question: str) -> str:
-    prompt = DIRECT_PROMPT.format(q=question)
-    generated = llm_pipe.invoke(prompt)
-    answer = generated.rsplit("Answer:", 1)[-1].strip() if "Answer:" in generated else generated.strip()
-    return postprocess_concise(answer, question)
+# --- LLM answer cache ---
+# Final answers keyed on model, prompt template and rendered prompt, so editing a
+# prompt or switching MODEL_NAME invalidates old entries. LLM_CACHE_PATH="" = memory only.
+LLM_CACHE = TieredCache(
+    os.getenv("LLM_CACHE_PATH", ".cache/llm.sqlite3") or None,
+    max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024")),
+    default_ttl=float(os.getenv("LLM_CACHE_TTL", "604800")),
+)
+NO_ANSWER = "Sorry, I couldn't find an answer."
 
-def llm_compose_answer(question: str, web_result: str) -> str:
-    prompt = COMPOSE_PROMPT.format(info=web_result, q=question)
-    generated = llm_pipe.invoke(prompt)
-    answer = generated.rsplit("Answer:", 1)[-1].strip() if "Answer:" in generated else generated.strip()
-    return answer if answer else "Sorry, I couldn't find an answer."
+def _answer_cache_key(template: str, prompt: str, options: dict | None = None, model: str = MODEL_NAME) -> str:
+    template_hash = hashlib.sha256(template.encode("utf-8")).hexdigest()
+    return TieredCache.make_key(model, template_hash, prompt, options or {})
+
+# Identical prompts generating at the same time (same answer cache key) share one
+# generation. Only within a scheduler lane: an interactive caller waiting on a
+# batch leader would sit behind all interactive work with no LLM_QUEUE_DEADLINE.
+LLM_FLIGHTS = SingleFlight("llm")
+
+def _flight_key(lane: str, key: str) -> str:
+    return f"{lane}:{key}"
+
+def coalesce_stats() -> dict:
+    """{"search": ..., "llm": ...} calls / coalesced / coalesce_rate of the single-flight groups."""
+    return {"search": SEARCH_FLIGHTS.stats(), "llm": LLM_FLIGHTS.stats()}
+
+def _cached_answer(namespace: str, key: str, use_cache: bool) -> str | None:
+    # use_cache=False skips the lookup but the fresh answer is still stored
+    return LLM_CACHE.get(namespace, key) if use_cache else None
+
+# --- Semantic answer cache (SEMANTIC_CACHE=1) ---
+# Catches rephrasings of direct questions that the exact cache misses. In memory only.
+# EMBED_MODEL=hashing uses the offline HashingEmbedder instead of Ollama embeddings.
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE", "0") == "1"
+_semantic_cache = None
+_semantic_lock = threading.Lock()
+
+def get_semantic_cache():
+    global _semantic_cache
+    if _semantic_cache is None:
+        with _semantic_lock:
+            if _semantic_cache is None:
+                from semantic_cache import HashingEmbedder, SemanticCache
+                embed_model = os.getenv("EMBED_MODEL", "nomic-embed-text")
+                if embed_model == "hashing":
+                    embedder = HashingEmbedder()
+                else:
+                    from langchain_ollama import OllamaEmbeddings
+                    embedder = OllamaEmbeddings(model=embed_model)
+                _semantic_cache = SemanticCache(
+                    embedder,
+                    threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92")),
+                    max_entries=int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "2048")),
+                )
+    return _semantic_cache
+
+def _semantic_lookup(question: str, use_cache: bool) -> str | None:
+    if not (SEMANTIC_CACHE_ENABLED and use_cache):
+        return None
+    try:
+        hit = get_semantic_cache().lookup(question)
+    except Exception:
+        return None  # embedding backend unavailable: behave like a miss
+    return hit[0] if hit else None
+
+def _semantic_add(question: str, answer: str):
+    # "I don't know." would otherwise be served to every nearby question
+    if not SEMANTIC_CACHE_ENABLED or answer == "I don't know.":
+        return
+    try:
+        get_semantic_cache().add(question, answer)
+    except Exception:
+        pass
+
+def _cached_direct_answer(question: str, key: str, use_cache: bool) -> str | None:
+    cached = _cached_answer("direct", key, use_cache)
+    if cached is None:
+        cached = _semantic_lookup(question, use_cache)
+        if cached is not None:
+            LLM_CACHE.set("direct", key, cached)
+    return cached
+
+def _store_direct_answer(question: str, key: str, answer: str):
+    LLM_CACHE.set("direct", key, answer)
+    _semantic_add(question, answer)
+
+# Embedding a question is a blocking HTTP call to Ollama; the async path runs it in a thread
+async def _cached_direct_answer_async(question: str, key: str, use_cache: bool) -> str | None:
+    cached = _cached_answer("direct", key, use_cache)
+    if cached is None and SEMANTIC_CACHE_ENABLED and use_cache:
+        cached = await asyncio.to_thread(_semantic_lookup, question, use_cache)
+        if cached is not None:
+            LLM_CACHE.set("direct", key, cached)
+    return cached
+
+async def _store_direct_answer_async(question: str, key: str, answer: str):
+    LLM_CACHE.set("direct", key, answer)
+    if SEMANTIC_CACHE_ENABLED:
+        await asyncio.to_thread(_semantic_add, question, answer)
+
+def _store_compose_answer(key: str, answer: str):
+    if answer != NO_ANSWER:
+        LLM_CACHE.set("compose", key, answer.strip())
+
+# --- Generation budgets ---
+# Per-route caps sent to Ollama as num_predict / stop sequences. A direct answer is
+# cut to one sentence anyway, so its stream is also cancelled as soon as that
+# sentence is complete; compose answers are multi-sentence and get a larger cap.
+# Passing `options` replaces the client defaults, so the stop list travels inside it.
+GENERATION_BUDGETS = {
+    "direct": {"num_predict": int(os.getenv("DIRECT_MAX_TOKENS", "64")), "stop": ["\n\n", "\nQuestion:"]},
+    "compose": {"num_predict": int(os.getenv("COMPOSE_MAX_TOKENS", "384")), "stop": ["\nQuestion:"]},
+}
+GENERATION_STATS: Counter = Counter()
+_generation_lock = threading.Lock()
+
+# --- LLM scheduling ---
+# Every generation holds a scheduler slot (LLM_MAX_CONCURRENCY at once). Waiting
+# requests queue by lane, direct before compose before batch, and sessions take
+# turns within a lane. Interactive requests that would wait longer than
+# LLM_QUEUE_DEADLINE get BUSY_ANSWER instead.
+LLM_SCHEDULER = LLMScheduler()
+BUSY_ANSWER = "Sorry, I'm handling too many questions right now. Please try again in a moment."
+
+def _lane(route: str, batch: bool) -> str:
+    return "batch" if batch else route
+
+def scheduler_stats() -> dict:
+    """Queue times and admissions per lane, see LLMScheduler.stats."""
+    return LLM_SCHEDULER.stats()
+
+def _generation_options(route: str) -> dict:
+    budget = GENERATION_BUDGETS[route]
+    return {"num_predict": budget["num_predict"], "stop": list(budget["stop"])}
+
+def _record_generation(route: str, tokens: int, early_stop: bool, report: dict | None):
+    """
+    Count streamed chunks (one token each from Ollama) for a route. When the
+    stream was cancelled early, the tokens the budget still allowed are counted as saved.
+    """
+    saved = max(GENERATION_BUDGETS[route]["num_predict"] - tokens, 0) if early_stop else 0
+    with _generation_lock:
+        GENERATION_STATS[route, "requests"] += 1
+        GENERATION_STATS[route, "tokens_generated"] += tokens
+        GENERATION_STATS[route, "tokens_saved"] += saved
+        GENERATION_STATS[route, "early_stops"] += int(early_stop)
+    if report is not None:
+        report.update(route=route, tokens_generated=tokens, tokens_saved=saved, early_stop=early_stop)
+
+def generation_stats() -> dict:
+    """{route: {"requests", "tokens_generated", "tokens_saved", "early_stops"}}"""
+    routes: dict[str, dict[str, int]] = {}
+    with _generation_lock:
+        for (route, name), count in GENERATION_STATS.items():
+            routes.setdefault(route, {})[name] = count
+    return routes
 
 def postprocess_concise(answer: str, question: str) -> str:
     first = re.split(r"(?<=[.!?])\s+", answer.strip(), maxsplit=1)[0]
@@ -230,55 +405,613 @@ def postprocess_concise(answer: str, question: str) -> str:
     first = re.sub(r"\s+", " ", first).strip()
     return first if first else "I don't know."
 
-def agent_streamlit_response(user_input: str):
+_ANSWER_TAG = re.compile(r"^answer:\s*", re.I)
+_SENTENCE_END = re.compile(r"[.!?]\s")
+# Hold back output until a leading "the answer is" / "it's" could no longer be forming.
+_FILLER_HOLD = len("the answer is ")
+
+class _SentenceCutter:
+    """
+    Incremental postprocess_concise. feed() returns the new part of the first
+    sentence as chunks arrive and sets `done` once that sentence is complete, so
+    the caller can cancel generation; finish() returns whatever is left after
+    the stream ended on its own.
+    """
+
+    def __init__(self, question: str):
+        self.question = question
+        self.text = ""
+        self.sent = ""
+        self.done = False
+
+    def _advance(self, first: str) -> str:
+        if first.startswith(self.sent) and len(first) > len(self.sent):
+            delta = first[len(self.sent):]
+            self.sent = first
+            return delta
+        return ""
+
+    def feed(self, chunk: str) -> str:
+        self.text += chunk
+        head = _ANSWER_TAG.sub("", self.text.lstrip())
+        self.done = _SENTENCE_END.search(head) is not None
+        if not self.done and len(head) < _FILLER_HOLD:
+            return ""
+        if self.done:
+            return self._advance(postprocess_concise(head, self.question))
+        return self._advance(re.sub(r"^(the answer is|it is|it's)\s+", "", re.sub(r"\s+", " ", head), flags=re.I))
+
+    def finish(self) -> str:
+        if self.done:
+            return ""
+        return self._advance(postprocess_concise(_ANSWER_TAG.sub("", self.text.lstrip()), self.question))
+
+def _direct_chunks(prompt: str, question: str, report: dict | None, model: str = MODEL_NAME) -> Iterator[str]:
+    with llm_stream(prompt, _generation_options("direct"), hedge=True, report=report, model=model) as stream:
+        cutter = _SentenceCutter(question)
+        tokens = 0
+        try:
+            for chunk in stream:
+                tokens += 1
+                delta = cutter.feed(chunk)
+                if delta:
+                    yield delta
+                if cutter.done:
+                    break
+            tail = cutter.finish()
+            if tail:
+                yield tail
+        finally:
+            _record_generation("direct", tokens, cutter.done, report)
+
+async def _direct_text_async(prompt: str, question: str, report: dict | None, model: str = MODEL_NAME) -> str:
+    async with llm_astream(prompt, _generation_options("direct"), hedge=True, report=report, model=model) as stream:
+        cutter = _SentenceCutter(question)
+        tokens = 0
+        parts = []
+        try:
+            async for chunk in stream:
+                tokens += 1
+                parts.append(cutter.feed(chunk))
+                if cutter.done:
+                    break
+            parts.append(cutter.finish())
+        finally:
+            _record_generation("direct", tokens, cutter.done, report)
+        return "".join(parts)
+
+def _generate_direct(prompt: str, question: str, report: dict | None, lane: str = "direct",
+                     session_id: str | None = None) -> Iterator[str]:
+    with LLM_SCHEDULER.slot(lane, session_id, report):
+        if CASCADE.enabled:
+            answer = _small_direct_answer(prompt, question, report)
+            if answer is not None:
+                yield answer
+                return
+        start = time.perf_counter()
+        yield from _direct_chunks(prompt, question, report)
+        if CASCADE.enabled:
+            CASCADE.record("large", time.perf_counter() - start)
+
+async def _generate_direct_async(prompt: str, question: str, report: dict | None, lane: str = "direct",
+                                 session_id: str | None = None) -> str:
+    async with LLM_SCHEDULER.slot_async(lane, session_id, report):
+        if CASCADE.enabled:
+            answer = await _small_direct_answer_async(prompt, question, report)
+            if answer is not None:
+                return answer
+        start = time.perf_counter()
+        answer = await _direct_text_async(prompt, question, report)
+        if CASCADE.enabled:
+            CASCADE.record("large", time.perf_counter() - start)
+        return answer
+
+# --- Model cascade (SMALL_MODEL_NAME) ---
+# Direct questions go to the small model first and MODEL_NAME answers the hard ones
+# and those the small model is unsure of (see cascade.py). The small model's answer
+# has to be judged whole, so it arrives in one piece rather than streamed.
+CASCADE = Cascade(SMALL_MODEL_NAME)
+
+def cascade_stats() -> dict:
+    """Fraction answered per tier, escalations by reason and latency saved, see Cascade.stats."""
+    return CASCADE.stats()
+
+def _skip_small(question: str, report: dict | None) -> bool:
+    if CASCADE.escalation(question) is None:
+        return False
+    CASCADE.record_escalation("hard")
+    if report is not None:
+        report.update(tier="large", escalated="hard")
+    return True
+
+def _keep_small(question: str, answer: str | None, elapsed: float, report: dict | None) -> str | None:
+    """The small model's answer if it stands, else None with the escalation recorded (answer=None: it failed)."""
+    reason = "error" if answer is None else CASCADE.escalation(question, answer)
+    if reason is None:
+        CASCADE.record("small", elapsed)
+    else:
+        CASCADE.record_escalation(reason, elapsed)
+    if report is not None:
+        report.update(tier="large" if reason else "small", escalated=reason)
+    return None if reason else answer
+
+def _small_direct_answer(prompt: str, question: str, report: dict | None) -> str | None:
+    if _skip_small(question, report):
+        return None
+    start = time.perf_counter()
+    try:
+        answer = "".join(_direct_chunks(prompt, question, report, CASCADE.small_model))
+    except Exception as e:
+        logger.warning("small model %s failed, escalating: %r", CASCADE.small_model, e)
+        answer = None
+    return _keep_small(question, answer, time.perf_counter() - start, report)
+
+async def _small_direct_answer_async(prompt: str, question: str, report: dict | None) -> str | None:
+    if _skip_small(question, report):
+        return None
+    start = time.perf_counter()
+    try:
+        answer = await _direct_text_async(prompt, question, report, CASCADE.small_model)
+    except Exception as e:
+        logger.warning("small model %s failed, escalating: %r", CASCADE.small_model, e)
+        answer = None
+    return _keep_small(question, answer, time.perf_counter() - start, report)
+
+def _direct_cache_key(prompt: str, options: dict) -> str:
+    # With the cascade on, an answer may come from either model
+    model = f"{CASCADE.small_model}>{MODEL_NAME}" if CASCADE.enabled else MODEL_NAME
+    return _answer_cache_key(DIRECT_PROMPT, prompt, options, model)
+
+def _generate_compose(prompt: str, report: dict | None, lane: str = "compose",
+                      session_id: str | None = None) -> Iterator[str]:
+    with LLM_SCHEDULER.slot(lane, session_id, report), llm_stream(prompt, _generation_options("compose")) as stream:
+        tokens = 0
+        started = False
+        try:
+            for chunk in stream:
+                tokens += 1
+                if not started:
+                    chunk = _ANSWER_TAG.sub("", chunk.lstrip())
+                    if not chunk:
+                        continue
+                    started = True
+                yield chunk
+        finally:
+            _record_generation("compose", tokens, False, report)
+
+async def _generate_compose_async(prompt: str, report: dict | None, lane: str = "compose",
+                                  session_id: str | None = None) -> str:
+    async with LLM_SCHEDULER.slot_async(lane, session_id, report), \
+            llm_astream(prompt, _generation_options("compose")) as stream:
+        tokens = 0
+        parts = []
+        try:
+            async for chunk in stream:
+                tokens += 1
+                parts.append(chunk)
+        finally:
+            _record_generation("compose", tokens, False, report)
+        return _ANSWER_TAG.sub("", "".join(parts).strip())
+
+def llm_direct_answer(question: str, use_cache: bool = True, report: dict | None = None,
+                      session_id: str | None = None, batch: bool = False) -> str:
+    return "".join(llm_direct_stream(question, use_cache=use_cache, report=report, session_id=session_id, batch=batch))
+
+def llm_compose_answer(question: str, web_result: str, use_cache: bool = True, report: dict | None = None,
+                       session_id: str | None = None, batch: bool = False) -> str:
+    return "".join(llm_compose_stream(
+        question, web_result, use_cache=use_cache, report=report, session_id=session_id, batch=batch,
+    ))
+
+async def llm_direct_answer_async(question: str, use_cache: bool = True, report: dict | None = None,
+                                  session_id: str | None = None, batch: bool = False) -> str:
+    prompt = DIRECT_PROMPT.format(q=question)
+    options = _generation_options("direct")
+    key = _direct_cache_key(prompt, options)
+    cached = await _cached_direct_answer_async(question, key, use_cache)
+    if cached is not None:
+        return cached
+    lane = _lane("direct", batch)
+    answer, shared = await LLM_FLIGHTS.do_async(
+        _flight_key(lane, key), _fresh_direct_answer_async, prompt, question, key, report, lane, session_id,
+    )
+    if shared and report is not None:
+        report["coalesced"] = True
+    return answer
+
+async def _fresh_direct_answer_async(prompt: str, question: str, key: str, report: dict | None, lane: str,
+                                     session_id: str | None) -> str:
+    answer = await _generate_direct_async(prompt, question, report, lane, session_id)
+    await _store_direct_answer_async(question, key, answer)
+    return answer
+
+async def llm_compose_answer_async(question: str, web_result: str, use_cache: bool = True,
+                                   report: dict | None = None, session_id: str | None = None,
+                                   batch: bool = False) -> str:
+    prompt = COMPOSE_PROMPT.format(info=web_result, q=question)
+    options = _generation_options("compose")
+    key = _answer_cache_key(COMPOSE_PROMPT, prompt, options)
+    cached = _cached_answer("compose", key, use_cache)
+    if cached is not None:
+        return cached
+    lane = _lane("compose", batch)
+    answer, shared = await LLM_FLIGHTS.do_async(
+        _flight_key(lane, key), _fresh_compose_answer_async, prompt, key, report, lane, session_id,
+    )
+    if shared and report is not None:
+        report["coalesced"] = True
+    return answer
+
+async def _fresh_compose_answer_async(prompt: str, key: str, report: dict | None, lane: str,
+                                      session_id: str | None) -> str:
+    answer = (await _generate_compose_async(prompt, report, lane, session_id)).strip() or NO_ANSWER
+    _store_compose_answer(key, answer)
+    return answer
+
+def _single_flight_stream(key: str, generate: Callable[[], Iterator[str]], store: Callable[[str], None],
+                          report: dict | None) -> Iterator[str]:
+    """
+    Streams generate() and store()s the complete answer, unless the same prompt
+    is already generating in the same lane (`key` from _flight_key): then waits
+    for that answer and yields it whole (report gets "coalesced"). If the
+    leading stream is abandoned before its end, the callers waiting on it
+    generate for themselves.
+    """
+    call, leader = LLM_FLIGHTS.join(key)
+    if not leader:
+        answer = call.wait()
+        if answer is not None:
+            if report is not None:
+                report["coalesced"] = True
+            yield answer
+            return
+    answer = None
+    try:
+        parts = []
+        for chunk in generate():
+            parts.append(chunk)
+            yield chunk
+        # Only reached when the consumer read the whole answer
+        answer = "".join(parts)
+        store(answer)
+    finally:
+        if leader:
+            LLM_FLIGHTS.finish(key, call, answer)
+
+def llm_direct_stream(question: str, use_cache: bool = True, report: dict | None = None,
+                      session_id: str | None = None, batch: bool = False) -> Iterator[str]:
+    """
+    Streams the one-sentence direct answer. `report`, when given, receives the
+    generation accounting (tokens_generated / tokens_saved / early_stop) and
+    queue_time. Raises LLMBusy when the scheduler turns the request away.
+    """
+    prompt = DIRECT_PROMPT.format(q=question)
+    options = _generation_options("direct")
+    key = _direct_cache_key(prompt, options)
+    cached = _cached_direct_answer(question, key, use_cache)
+    if cached is not None:
+        yield cached
+        return
+    lane = _lane("direct", batch)
+    yield from _single_flight_stream(
+        _flight_key(lane, key), lambda: _generate_direct(prompt, question, report, lane, session_id),
+        lambda answer: _store_direct_answer(question, key, answer), report,
+    )
+
+def llm_compose_stream(question: str, web_result: str, use_cache: bool = True, report: dict | None = None,
+                       session_id: str | None = None, batch: bool = False) -> Iterator[str]:
+    prompt = COMPOSE_PROMPT.format(info=web_result, q=question)
+    options = _generation_options("compose")
+    key = _answer_cache_key(COMPOSE_PROMPT, prompt, options)
+    cached = _cached_answer("compose", key, use_cache)
+    if cached is not None:
+        yield cached
+        return
+    lane = _lane("compose", batch)
+    yield from _single_flight_stream(
+        _flight_key(lane, key), lambda: _compose_chunks(prompt, report, lane, session_id),
+        lambda answer: _store_compose_answer(key, answer), report,
+    )
+
+def _compose_chunks(prompt: str, report: dict | None, lane: str, session_id: str | None) -> Iterator[str]:
+    parts = []
+    for chunk in _generate_compose(prompt, report, lane, session_id):
+        parts.append(chunk)
+        yield chunk
+    if not "".join(parts).strip():
+        yield NO_ANSWER
+
+def plan_response(user_input: str) -> dict:
+    """
+    Decide how a question will be answered without calling any tool or the LLM.
+    Returns a dict with "category", "question", "tool", "route" and the route's arguments.
+    """
     category = detect_category(user_input)
+    plan = {"category": category, "question": user_input}
     weather_intent = get_weather_intent(user_input)
     if weather_intent:
         city = extract_city(user_input)
         if not city:
-            answer = "Please specify the city for the forecast."
-            tool = "Weather"
+            plan.update(route="reply", tool="Weather", answer="Please specify the city for the forecast.")
         else:
-            answer = answer_weather_forecast(city, weather_intent)
-            tool = "Weather"
+            plan.update(route="weather_intent", tool="Weather", city=city, intent=weather_intent)
     elif is_weather_related(user_input):
         city = extract_city(user_input)
         if not city:
-            if "forecast" in user_input.lower():
+            if scan_question(user_input).has("forecast"):
                 answer = "Please specify the city for the forecast."
             else:
                 answer = "Please specify the city for the weather."
-            tool = "Weather"
-        elif "forecast" in user_input.lower():
-            answer = get_weather_forecast(city)
-            tool = "Weather"
+            plan.update(route="reply", tool="Weather", answer=answer)
+        elif scan_question(user_input).has("forecast"):
+            plan.update(route="forecast", tool="Weather", city=city)
         else:
-            answer = get_weather(city)
-            tool = "Weather"
+            plan.update(route="weather", tool="Weather", city=city)
     elif is_time_sensitive(user_input):
-        query = get_best_query(user_input)
-        serp_result = web_search(query)
-        if not serp_result or "Sorry" in serp_result:
-            answer = "Sorry, I couldn't find an answer."
-            tool = "Search"
-        else:
-            answer = llm_compose_answer(user_input, serp_result)
-            tool = "Search"
+        plan.update(route="search", tool="Search", query=get_best_query(user_input))
+    elif name := who_is_name(user_input):
+        plan.update(route="search", tool="Search", query=name)
     else:
-        answer = llm_direct_answer(user_input)
-        tool = "LLM"
-    return answer, category, tool
+        plan.update(route="llm", tool="LLM")
+    return plan
+
+# --- Context packing ---
+# Search text is trimmed to the passages most relevant to the question before it
+# is pasted into COMPOSE_PROMPT, since prompt prefill dominates compose latency.
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "300"))  # 0 = paste search text unchanged
+CONTEXT_DEDUPE_THRESHOLD = float(os.getenv("CONTEXT_DEDUPE_THRESHOLD", "0.7"))
+
+# --- Search answer fast path ---
+# When the search engine already states the fact, return it instead of paying for
+# a compose round trip. Each candidate gets a confidence; the best one at or above
+# SEARCH_BYPASS_MIN_CONFIDENCE is returned as is. SEARCH_BYPASS=0 always composes.
+SEARCH_BYPASS_ENABLED = os.getenv("SEARCH_BYPASS", "1") == "1"
+SEARCH_BYPASS_MIN_CONFIDENCE = float(os.getenv("SEARCH_BYPASS_MIN_CONFIDENCE", "0.75"))
+SEARCH_BYPASS_STATS: Counter = Counter()
+_bypass_lock = threading.Lock()
+
+_WHO_IS = re.compile(r"(?:who|what)\s+(?:is|was|are|were)\s+(.+)", re.I)
+_FIRST_SENTENCE = re.compile(r"(?<=[.!?])\s+(?=[A-Z])")
+
+def _words(text: str) -> set[str]:
+    return set(re.findall(r"\w+", text.lower())) - {"the", "a", "an", "of", "in", "is", "was", "who", "what"}
+
+def _first_sentence(text: str) -> str:
+    return _FIRST_SENTENCE.split(text.strip(), maxsplit=1)[0].strip()
+
+def search_answer_candidates(question: str, result: SearchResult) -> list[tuple[float, str, str]]:
+    """
+    (confidence, source, answer) for every fact in `result` that could answer
+    `question` on its own, best first. The policy:
+    - answer_box "answer": the engine's own direct answer (0.9).
+    - answer_box snippet: usually a passage around the answer, not the answer (0.6).
+    - knowledge_graph description for "who/what is X": when X is the graph's
+      title (a type word may follow, "Python programming language") or its
+      multi-word type ("the president of France") (0.8), otherwise (0.5), as a
+      description does not answer "how many trophies has Real Madrid won".
+    - Wikipedia first sentence for "who/what is X": when X is a name (see
+      who_is_name) and the page title is X (0.75), otherwise (0.4).
+    """
+    who_is = _WHO_IS.fullmatch(clip_question(question).strip().rstrip("?").rstrip())
+    candidates = []
+    box = result.answer_box
+    if box.get("answer") and len(str(box["answer"])) <= 200:
+        candidates.append((0.9, "answer_box", str(box["answer"]).strip()))
+    snippet = box.get("snippet") or box.get("highlighted_snippet")
+    if isinstance(snippet, str) and snippet.strip():
+        candidates.append((0.6, "answer_box_snippet", _first_sentence(snippet)))
+    kg = result.knowledge_graph
+    if kg.get("description"):
+        title, kind = _words(str(kg.get("title", ""))), _words(str(kg.get("type", "")))
+        subject = _words(who_is.group(1)) if who_is else set()
+        # A one-word type ("Country", "Person") names too many things to count as a match
+        named = bool(subject) and ((title and title <= subject <= title | kind) or (len(kind) >= 2 and subject == kind))
+        confidence = 0.8 if named else 0.5
+        candidates.append((confidence, "knowledge_graph", _first_sentence(str(kg["description"]))))
+    wiki = result.wiki
+    if wiki.get("extract") and who_is:
+        name = who_is_name(question)
+        confidence = 0.75 if name and _words(name) == _words(wiki.get("title", "")) else 0.4
+        candidates.append((confidence, "wikipedia", _first_sentence(wiki["extract"])))
+    return sorted((c for c in candidates if c[2]), key=lambda c: -c[0])
+
+def search_fast_answer(question: str, result: SearchResult) -> tuple[str, str] | None:
+    """(answer, source) when a search fact clears the confidence policy, else None. Counted either way."""
+    best = None
+    if SEARCH_BYPASS_ENABLED:
+        candidates = search_answer_candidates(question, result)
+        if candidates and candidates[0][0] >= SEARCH_BYPASS_MIN_CONFIDENCE:
+            best = candidates[0]
+    with _bypass_lock:
+        SEARCH_BYPASS_STATS["searches"] += 1
+        if best:
+            SEARCH_BYPASS_STATS["bypassed"] += 1
+            SEARCH_BYPASS_STATS["source", best[1]] += 1
+    return (best[2], best[1]) if best else None
+
+def search_bypass_stats() -> dict:
+    """{"searches", "bypassed", "bypass_rate", "sources": {source: count}}"""
+    with _bypass_lock:
+        searches = SEARCH_BYPASS_STATS["searches"]
+        bypassed = SEARCH_BYPASS_STATS["bypassed"]
+        sources = {k[1]: v for k, v in SEARCH_BYPASS_STATS.items() if isinstance(k, tuple)}
+    return {
+        "searches": searches, "bypassed": bypassed,
+        "bypass_rate": bypassed / searches if searches else 0.0, "sources": sources,
+    }
+
+def _answer_from_search(plan: dict, result: SearchResult) -> str | None:
+    """Final answer for a search plan if the fast path applies; otherwise packs the compose context."""
+    if not result:
+        return NO_ANSWER
+    fast = search_fast_answer(plan["question"], result)
+    if fast:
+        plan["answer_source"] = fast[1]
+        return fast[0]
+    plan["answer_source"] = "llm"
+    _pack_web_result(plan, result.text)
+    return None
+
+def _pack_web_result(plan: dict, web_result: str):
+    """Sets plan["web_result"] to the packed search text and plan["context"] to the packing stats."""
+    if CONTEXT_TOKEN_BUDGET <= 0:
+        plan["web_result"] = web_result
+        return
+    from context_pack import estimate_tokens, pack_context
+    question = plan["question"]
+    packed, stats = pack_context(f"{question} {plan['query']}", web_result, CONTEXT_TOKEN_BUDGET,
+                                 CONTEXT_DEDUPE_THRESHOLD)
+    stats["prompt_tokens_before"] = estimate_tokens(COMPOSE_PROMPT.format(info=web_result, q=question))
+    stats["prompt_tokens_after"] = estimate_tokens(COMPOSE_PROMPT.format(info=packed, q=question))
+    logger.info(
+        "compose prompt %d -> %d tokens (kept %d of %d passages, %d near-duplicates)",
+        stats["prompt_tokens_before"], stats["prompt_tokens_after"],
+        stats["kept"], stats["passages"], stats["duplicates"],
+    )
+    plan["web_result"] = packed
+    plan["context"] = stats
+
+def _run_tool(plan: dict) -> str | None:
+    """Run the non-LLM part of a plan; returns the final answer, or None when the LLM must answer."""
+    route = plan["route"]
+    if route == "reply":
+        return plan["answer"]
+    if route == "weather_intent":
+        return _weather_answer(plan, get_weather_forecast(plan["city"]), plan["intent"])
+    if route == "forecast":
+        return _weather_answer(plan, get_weather_forecast(plan["city"]))
+    if route == "weather":
+        return _weather_answer(plan, get_weather(plan["city"]))
+    if route == "search":
+        return _answer_from_search(plan, web_search(plan["query"]))
+    return None
+
+async def _run_tool_async(plan: dict) -> str | None:
+    route = plan["route"]
+    if route == "reply":
+        return plan["answer"]
+    if route == "weather_intent":
+        return _weather_answer(plan, await get_weather_forecast_async(plan["city"]), plan["intent"])
+    if route == "forecast":
+        return _weather_answer(plan, await get_weather_forecast_async(plan["city"]))
+    if route == "weather":
+        return _weather_answer(plan, await get_weather_async(plan["city"]))
+    if route == "search":
+        return _answer_from_search(plan, await web_search_async(plan["query"]))
+    return None
+
+def agent_streamlit_response(user_input: str, use_cache: bool = True, session_id: str | None = None,
+                             batch: bool = False):
+    """
+    session_id identifies the asking session for fair LLM scheduling; batch=True
+    queues behind interactive questions and never gets BUSY_ANSWER.
+    """
+    plan = plan_response(user_input)
+    answer = _run_tool(plan)
+    if answer is None:
+        try:
+            if plan["route"] == "search":
+                answer = llm_compose_answer(user_input, plan["web_result"], use_cache=use_cache,
+                                            session_id=session_id, batch=batch)
+            else:
+                answer = llm_direct_answer(user_input, use_cache=use_cache, session_id=session_id, batch=batch)
+        except LLMBusy:
+            answer = BUSY_ANSWER
+    return answer, plan["category"], plan["tool"]
+
+async def agent_streamlit_response_async(user_input: str, use_cache: bool = True, session_id: str | None = None,
+                                         batch: bool = False):
+    """Async twin of agent_streamlit_response; many sessions can share one event loop."""
+    plan = plan_response(user_input)
+    answer = await _run_tool_async(plan)
+    if answer is None:
+        try:
+            if plan["route"] == "search":
+                answer = await llm_compose_answer_async(user_input, plan["web_result"], use_cache=use_cache,
+                                                        session_id=session_id, batch=batch)
+            else:
+                answer = await llm_direct_answer_async(user_input, use_cache=use_cache, session_id=session_id,
+                                                       batch=batch)
+        except LLMBusy:
+            answer = BUSY_ANSWER
+    return answer, plan["category"], plan["tool"]
+
+def agent_streamlit_stream(user_input: str, use_cache: bool = True, session_id: str | None = None,
+                           batch: bool = False) -> tuple[Iterator[str], dict]:
+    """
+    Streaming variant of agent_streamlit_response (use_cache=False skips the LLM answer cache lookup).
+    Returns (tokens, meta): tokens yields the answer incrementally; meta holds
+    "category", "tool" and "route" up front and is completed with "answer" and
+    "timings" (route / tool / first_token / total, seconds since the call) once
+    tokens is exhausted. "generation" gets tokens_generated / tokens_saved /
+    early_stop / queue_time when the LLM produced the answer (empty for tools and
+    cache hits, just "coalesced" when an identical prompt already generating
+    supplied it); "busy" is set when the LLM scheduler turned the question away;
+    "context" gets the context packing stats for search answers, and
+    "answer_source" says whether a search answer came from the LLM or a search fact.
+    Weather answers also set "markdown", the same answer formatted for display.
+    """
+    start = time.perf_counter()
+    plan = plan_response(user_input)
+    meta = {
+        "category": plan["category"], "tool": plan["tool"], "route": plan["route"], "answer": "",
+        "timings": {"route": time.perf_counter() - start}, "generation": {}, "context": {},
+    }
+
+    def tokens() -> Iterator[str]:
+        timings = meta["timings"]
+        parts = []
+        try:
+            answer = _run_tool(plan)
+            timings["tool"] = time.perf_counter() - start
+            meta["context"].update(plan.get("context", {}))
+            if "answer_source" in plan:
+                meta["answer_source"] = plan["answer_source"]
+            if "markdown" in plan:
+                meta["markdown"] = plan["markdown"]
+            if answer is not None:
+                chunks = iter([answer])
+            elif plan["route"] == "search":
+                chunks = llm_compose_stream(user_input, plan["web_result"], use_cache=use_cache,
+                                            report=meta["generation"], session_id=session_id, batch=batch)
+            else:
+                chunks = llm_direct_stream(user_input, use_cache=use_cache, report=meta["generation"],
+                                           session_id=session_id, batch=batch)
+            try:
+                for chunk in chunks:
+                    if not parts:
+                        timings["first_token"] = time.perf_counter() - start
+                    parts.append(chunk)
+                    yield chunk
+            except LLMBusy:
+                # Turned away before the first token: say so rather than queue
+                meta["busy"] = True
+                parts.append(BUSY_ANSWER)
+                yield BUSY_ANSWER
+        finally:
+            meta["answer"] = "".join(parts)
+            timings["total"] = time.perf_counter() - start
+
+    return tokens(), meta
 
 if __name__ == "__main__":
     print("⚡🧠 Raychel AI (Type 'exit' to quit)")
+    if PREWARM_ON_START:
+        prewarm_connections()
+    if WARMUP_ON_START:
+        start_warmup()
     from datetime import datetime
     while True:
         user_input = input("You: ").strip()
         if user_input.lower() in {"exit", "quit", "bye"}:
             print("Agent: Goodbye!")
             break
-        start_time = time.time()
-        answer, category, tool = agent_streamlit_response(user_input)
-        elapsed = time.time() - start_time
+        tokens, meta = agent_streamlit_stream(user_input)
         now = datetime.now().strftime("%H:%M")
-        print(f"[{now}] 🤖 Agent ({category}, {tool}, took {elapsed:.2f}s): {answer}")
\ No newline at end of file
+        print(f"[{now}] 🤖 Agent ({meta['category']}, {meta['tool']}): ", end="", flush=True)
+        for token in tokens:
+            print(token, end="", flush=True)
+        timings = meta["timings"]
+        generation = meta["generation"]
+        saved = f", {generation['tokens_saved']} tokens saved" if generation.get("tokens_saved") else ""
+        print(f"\n    (first token {timings.get('first_token', timings['total']):.2f}s, total {timings['total']:.2f}s{saved})")
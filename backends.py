@@ -0,0 +1,163 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+from http_client import get_session
+
+# A host without the model loaded counts as this many extra outstanding requests,
+# about what loading the model costs, so traffic sticks to warm hosts until they are busy
+COLD_HOST_PENALTY = 2
+PROBE_TIMEOUT = 2.0  # seconds
+
+def host_url(host: str) -> str:
+    """"gpu1:11434" -> "http://gpu1:11434" (OLLAMA_HOST style hosts may omit the scheme)."""
+    host = host.strip().rstrip("/")
+    return host if "://" in host else f"http://{host}"
+
+def _is_connection_error(e: BaseException) -> bool:
+    if isinstance(e, (ConnectionError, TimeoutError)):
+        return True
+    import httpx
+    return isinstance(e, httpx.TransportError)
+
+class Backend:
+    """One Ollama host and the client that talks to it."""
+
+    __slots__ = ("url", "client", "outstanding", "healthy", "resident", "served", "error", "checked_at")
+
+    def __init__(self, url: str, client: Any):
+        self.url = url
+        self.client = client
+        self.outstanding = 0
+        self.healthy = True
+        self.resident = False
+        self.served = 0
+        self.error: str | None = None
+        self.checked_at: float | None = None
+
+    def load(self) -> int:
+        return self.outstanding + (0 if self.resident else COLD_HOST_PENALTY)
+
+class BackendPool:
+    """
+    Ollama hosts serving one model. Each generation leases the healthy host
+    with the lowest load (outstanding generations, plus COLD_HOST_PENALTY when
+    the model is not loaded there), earlier hosts winning ties. A host is
+    ejected when its /api/ps probe or a request to it fails to connect, and
+    re-admitted by the next probe that succeeds. With every host ejected,
+    requests still go out (to the least loaded) rather than failing here.
+    """
+
+    def __init__(self, hosts: list[str], make_client: Callable[[str], Any], model: str):
+        if not hosts:
+            raise ValueError("BackendPool needs at least one host")
+        self.model = model
+        self.backends = [Backend(url, make_client(url)) for url in map(host_url, hosts)]
+        self._lock = threading.Lock()
+        self._health_thread: threading.Thread | None = None
+
+    def choose(self) -> Backend:
+        with self._lock:
+            return self._choose()
+
+    def _choose(self, exclude: Backend | None = None) -> Backend | None:
+        healthy = [b for b in self.backends if b.healthy and b is not exclude]
+        if exclude is not None:
+            return min(healthy, key=Backend.load, default=None)
+        return min(healthy or self.backends, key=Backend.load)
+
+    def acquire(self, exclude: Backend | None = None) -> Backend | None:
+        """
+        Count one generation as outstanding on the best backend and return it.
+        With `exclude`, only another healthy host will do (None when there is none).
+        Every acquire() needs a release().
+        """
+        with self._lock:
+            backend = self._choose(exclude)
+            if backend is not None:
+                backend.outstanding += 1
+            return backend
+
+    def release(self, backend: Backend, served: bool = False, error: BaseException | None = None):
+        """End a generation started with acquire(): served=True once it answered, `error` if it failed."""
+        if error is not None and _is_connection_error(error):
+            self.eject(backend, repr(error))
+        with self._lock:
+            backend.outstanding -= 1
+            if served:
+                # It answered, so the model is loaded there now
+                backend.served += 1
+                backend.resident = True
+
+    @contextmanager
+    def lease(self) -> Iterator[Backend]:
+        """The backend to send one generation to, counted as outstanding there until the block exits."""
+        backend = self.acquire()
+        served = False
+        error = None
+        try:
+            yield backend
+            served = True
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.release(backend, served, error)
+
+    def eject(self, backend: Backend, error: str):
+        with self._lock:
+            backend.healthy = False
+            backend.error = error
+
+    # --- Health checks ---
+    def _has_model(self, models: list[dict]) -> bool:
+        for m in models:
+            name = m.get("model") or m.get("name") or ""
+            if name == self.model or name.split(":", 1)[0] == self.model:
+                return True
+        return False
+
+    def probe(self, backend: Backend) -> bool:
+        """GET /api/ps: re-admits the host (and refreshes whether the model is loaded) or ejects it."""
+        try:
+            r = get_session().get(f"{backend.url}/api/ps", timeout=PROBE_TIMEOUT)
+            r.raise_for_status()
+            resident = self._has_model(r.json().get("models") or [])
+        except Exception as e:
+            self.eject(backend, repr(e))
+            backend.checked_at = time.time()
+            return False
+        with self._lock:
+            backend.healthy = True
+            backend.resident = resident
+            backend.error = None
+            backend.checked_at = time.time()
+        return True
+
+    def probe_all(self) -> int:
+        """Probe every host; returns how many are healthy."""
+        return sum(self.probe(b) for b in self.backends)
+
+    def start_health_checks(self, interval: float) -> threading.Thread | None:
+        """Probe all hosts every `interval` seconds in a daemon thread (once per pool)."""
+        if interval <= 0:
+            return None
+        with self._lock:
+            if self._health_thread is None:
+                def loop():
+                    while True:
+                        self.probe_all()
+                        time.sleep(interval)
+                self._health_thread = threading.Thread(target=loop, name="ollama-health", daemon=True)
+                self._health_thread.start()
+        return self._health_thread
+
+    def stats(self) -> list[dict]:
+        with self._lock:
+            return [
+                {
+                    "url": b.url, "healthy": b.healthy, "resident": b.resident, "outstanding": b.outstanding,
+                    "served": b.served, "error": b.error, "checked_at": b.checked_at,
+                }
+                for b in self.backends
+            ]
@@ -0,0 +1,153 @@
+"""
+Batch answering over a JSONL file of questions.
+
+    python batch.py questions.jsonl -o answers.jsonl --workers 4
+
+Each input line is {"id": ..., "question": ...} ("id" defaults to the line
+number). Results are appended to the output as JSONL in completion order with
+answer, category, tool, route and per-stage timings. Identical questions
+(case/whitespace-insensitive) are answered once. Re-running with the same
+output file skips ids that already have a result, so a crashed run resumes.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterator
+from agent_loop import agent_streamlit_stream
+
+def normalize_question(question: str) -> str:
+    return " ".join(question.lower().split())
+
+def read_requests(path: str) -> Iterator[dict]:
+    with open(path, encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                yield {"id": lineno, "question": None, "error": "invalid JSON"}
+                continue
+            yield {"id": row.get("id", lineno), "question": row.get("question")}
+
+def completed_ids(path: str, retry_errors: bool = False) -> set:
+    """Ids already in the output file; a half-written last line is ignored."""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                if retry_errors and "error" in record:
+                    continue
+                done.add(record["id"])
+            except (json.JSONDecodeError, KeyError, TypeError):
+                continue
+    return done
+
+def answer_question(question: str, use_cache: bool = True) -> dict:
+    # Batch questions queue behind interactive ones for the LLM
+    tokens, meta = agent_streamlit_stream(question, use_cache=use_cache, batch=True)
+    for _ in tokens:
+        pass
+    return {
+        "answer": meta["answer"],
+        "category": meta["category"],
+        "tool": meta["tool"],
+        "route": meta["route"],
+        "timings": {k: round(v, 4) for k, v in meta["timings"].items()},
+        "generation": meta["generation"],
+    }
+
+class BatchWriter:
+    """Thread-safe JSONL appender that flushes every record."""
+
+    def __init__(self, path: str):
+        # A crash can leave a partial last line; start on a fresh one
+        needs_newline = False
+        if os.path.exists(path) and os.path.getsize(path):
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b"\n"
+        self._f = open(path, "a", encoding="utf-8")
+        if needs_newline:
+            self._f.write("\n")
+        self._lock = threading.Lock()
+        self.written = 0
+
+    def write(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            self._f.write(line + "\n")
+            self._f.flush()
+            self.written += 1
+
+    def close(self):
+        self._f.close()
+
+def run_batch(input_path: str, output_path: str, workers: int = 4, use_cache: bool = True,
+              retry_errors: bool = False) -> dict:
+    done = completed_ids(output_path, retry_errors)
+    writer = BatchWriter(output_path)
+    # Bounded in-flight work so huge inputs are streamed rather than loaded
+    slots = threading.BoundedSemaphore(workers * 2)
+    inflight: dict[str, Future] = {}
+    stats = {"skipped": 0, "answered": 0, "deduplicated": 0, "errors": 0}
+    stats_lock = threading.Lock()
+    start = time.perf_counter()
+
+    def count(key: str):
+        with stats_lock:
+            stats[key] += 1
+
+    def emit(req: dict, fut: Future, first_id):
+        try:
+            result = fut.result()
+            record = {"id": req["id"], "question": req["question"], **result}
+            key = "answered"
+        except Exception as e:
+            record = {"id": req["id"], "question": req["question"], "error": repr(e)}
+            key = "errors"
+        if first_id != req["id"]:
+            record["duplicate_of"] = first_id
+            key = "deduplicated" if key == "answered" else key
+        writer.write(record)
+        count(key)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as pool:
+        for req in read_requests(input_path):
+            if req["id"] in done:
+                count("skipped")
+                continue
+            question = req["question"]
+            if not isinstance(question, str) or not question.strip():
+                writer.write({"id": req["id"], "question": question, "error": req.get("error", "missing question")})
+                count("errors")
+                continue
+            key = normalize_question(question)
+            entry = inflight.get(key)
+            if entry is None:
+                slots.acquire()
+                fut = pool.submit(answer_question, question, use_cache)
+                fut.add_done_callback(lambda _: slots.release())
+                entry = inflight[key] = (fut, req["id"])
+            fut, first_id = entry
+            fut.add_done_callback(lambda f, req=req, first_id=first_id: emit(req, f, first_id))
+    writer.close()
+    stats["elapsed"] = round(time.perf_counter() - start, 3)
+    return stats
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Answer a JSONL file of questions with the Raychel agent.")
+    parser.add_argument("input", help="JSONL file with one {\"id\", \"question\"} object per line")
+    parser.add_argument("-o", "--output", default="answers.jsonl", help="JSONL results file (appended to, for resume)")
+    parser.add_argument("-w", "--workers", type=int, default=4, help="concurrent questions")
+    parser.add_argument("--no-cache", action="store_true", help="skip LLM answer cache lookups")
+    parser.add_argument("--retry-errors", action="store_true", help="re-run ids whose earlier result was an error")
+    args = parser.parse_args()
+    stats = run_batch(args.input, args.output, args.workers, use_cache=not args.no_cache, retry_errors=args.retry_errors)
+    print(json.dumps(stats))
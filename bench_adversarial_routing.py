@@ -0,0 +1,58 @@
+"""
+Benchmark: worst-case routing time on hostile ~10k-character questions.
+
+Each input is built to hit a known slow path (regex backtracking over long
+letter-and-space runs, thousands of "who won" / "in" cues, one huge token,
+non-ASCII text) and routed with plan_response, which runs every predicate and
+the city/query extraction but calls no tool or LLM. Fails when any input's
+median routing time is over BUDGET_MS.
+Run: python bench_adversarial_routing.py
+"""
+import statistics
+import sys
+import time
+import routing
+from agent_loop import plan_response
+from gazetteer import get_gazetteer
+
+SIZE = 10_000
+BUDGET_MS = 1.0
+
+def _fill(unit: str, prefix: str = "", suffix: str = "") -> str:
+    return prefix + unit * ((SIZE - len(prefix) - len(suffix)) // len(unit)) + suffix
+
+ADVERSARIAL = {
+    "letters and spaces, weather first": _fill("a ", "weather ", "!"),
+    "letters and spaces, then weather": _fill("ab ", "", " weather"),
+    "rain intent, long city run": _fill("x ", "will it rain today in ", "?"),
+    "forecast, long city run": _fill("ab-c. ", "forecast ", "1"),
+    "repeated in": _fill("in ", "weather "),
+    "repeated in, misspelled cities": _fill("in chenai ", "weather "),
+    "repeated who won": _fill("who won "),
+    "who won, no year": _fill("the ", "who won ", " in year"),
+    "whitespace run": _fill(" ", "who won the ipl", "in 2020"),
+    "one huge token": _fill("x", "weather in "),
+    "non-ascii": _fill("é ", "weather in "),
+    "keywords everywhere": _fill("rain snow president who won 2024 "),
+}
+
+def route_ms(question: str, repeat: int = 21) -> float:
+    """Median time to route a question seen for the first time (scan cache cleared each run)."""
+    plan_response(question)
+    times = []
+    for _ in range(repeat):
+        routing.scan_question.cache_clear()
+        start = time.perf_counter()
+        plan_response(question)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1e3
+
+if __name__ == "__main__":
+    get_gazetteer().fuzzy  # build the indexes up front; that is a one-off, not per request
+    failures = 0
+    for name, question in ADVERSARIAL.items():
+        ms = route_ms(question)
+        failures += ms > BUDGET_MS
+        print(f"{name:<36} {len(question):>6} chars  {ms:8.3f} ms  {'ok' if ms <= BUDGET_MS else 'OVER BUDGET'}")
+    print(f"budget {BUDGET_MS} ms per question: {'pass' if not failures else f'{failures} over'}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,153 @@
+"""
+Benchmark: the Ollama backend pool against local fake Ollama servers.
+
+Each FakeOllama answers /api/ps and streams /api/generate one generation at a
+time (like OLLAMA_NUM_PARALLEL=1), with a per-token delay and a one-off model
+load delay. The run compares one host against three, then stops one host to
+show it being ejected and restarts it to show it coming back.
+Run: python bench_backends.py
+"""
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from backends import BackendPool
+from llm_client import MODEL_NAME, _make_llm
+
+class FakeOllama:
+    def __init__(self, port: int = 0, loaded: bool = False, tokens: int = 10, token_delay: float = 0.01,
+                 load_delay: float = 0.3):
+        self.port = port
+        self.loaded = loaded
+        self.tokens = tokens
+        self.token_delay = token_delay
+        self.load_delay = load_delay
+        self.generations = 0
+        self._busy = threading.Lock()
+        self._server: ThreadingHTTPServer | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def reply(self, request: dict) -> list[str]:
+        """The chunks streamed for one /api/generate request."""
+        steps = min(self.tokens, (request.get("options") or {}).get("num_predict") or self.tokens)
+        return [f"t{i} " for i in range(steps)]
+
+    def delay(self, request: dict) -> float:
+        """Seconds before each chunk."""
+        return self.token_delay
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _json(self, body: dict):
+                data = json.dumps(body).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path == "/api/ps":
+                    models = [{"name": f"{MODEL_NAME}:latest", "model": f"{MODEL_NAME}:latest"}] if fake.loaded else []
+                    self._json({"models": models})
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if self.path != "/api/generate":
+                    self.send_error(404)
+                    return
+                with fake._busy:
+                    if not fake.loaded:
+                        time.sleep(fake.load_delay)
+                        fake.loaded = True
+                    fake.generations += 1
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/x-ndjson")
+                    self.end_headers()
+                    delay = fake.delay(request)
+                    try:
+                        for chunk in fake.reply(request):
+                            time.sleep(delay)
+                            line = {"model": MODEL_NAME, "created_at": "2024-01-01T00:00:00Z", "response": chunk,
+                                    "done": False}
+                            self.wfile.write(json.dumps(line).encode() + b"\n")
+                            self.wfile.flush()
+                        done = {"model": MODEL_NAME, "created_at": "2024-01-01T00:00:00Z", "response": "", "done": True,
+                                "done_reason": "stop"}
+                        self.wfile.write(json.dumps(done).encode() + b"\n")
+                    except (BrokenPipeError, ConnectionResetError):
+                        pass  # the client closed the stream (an early stop or a cancelled hedge)
+
+        return Handler
+
+    def start(self) -> "FakeOllama":
+        self._server = ThreadingHTTPServer(("127.0.0.1", self.port), self._handler())
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+def generate(pool: BackendPool) -> str:
+    with pool.lease() as backend:
+        return "".join(backend.client.stream("Hi", options={"num_predict": 10}))
+
+def run(pool: BackendPool, requests: int, concurrency: int = 6) -> tuple[float, int]:
+    """(seconds, failed requests) for `requests` generations, `concurrency` at a time."""
+    failed = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as ex:
+        for fut in [ex.submit(generate, pool) for _ in range(requests)]:
+            try:
+                fut.result()
+            except Exception:
+                failed += 1
+    return time.perf_counter() - start, failed
+
+def show(pool: BackendPool, fakes: list[FakeOllama]):
+    for stat, fake in zip(pool.stats(), fakes):
+        print(f"    {stat['url']}: healthy={stat['healthy']} resident={stat['resident']} "
+              f"served={stat['served']} generations={fake.generations}")
+
+if __name__ == "__main__":
+    single = FakeOllama(loaded=True).start()
+    pool = BackendPool([single.url], _make_llm, MODEL_NAME)
+    secs, _ = run(pool, 30)
+    print(f"1 host:  30 generations in {secs:.2f} s")
+
+    fakes = [FakeOllama(loaded=True).start(), FakeOllama().start(), FakeOllama().start()]
+    pool = BackendPool([f.url for f in fakes], _make_llm, MODEL_NAME)
+    pool.start_health_checks(0.2)
+    time.sleep(0.3)
+    secs, _ = run(pool, 2, concurrency=1)
+    print(f"3 hosts, light load: 2 generations in {secs:.2f} s (stay on the warm host)")
+    show(pool, fakes)
+    secs, _ = run(pool, 30)
+    print(f"3 hosts, 6 concurrent: 30 generations in {secs:.2f} s")
+    show(pool, fakes)
+
+    fakes[1].stop()
+    time.sleep(0.5)
+    secs, failed = run(pool, 30)
+    print(f"host 2 down: 30 generations in {secs:.2f} s, {failed} failed")
+    show(pool, fakes)
+
+    fakes[1].start()  # same port
+    time.sleep(0.5)
+    secs, failed = run(pool, 30)
+    print(f"host 2 back: 30 generations in {secs:.2f} s, {failed} failed")
+    show(pool, fakes)
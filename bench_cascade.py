@@ -0,0 +1,81 @@
+"""
+Benchmark: the small-model cascade for direct answers, against a fake Ollama.
+
+The fake host streams canned answers: the small model at 5 ms a token, the
+big one at 40 ms (roughly a 1B model against mistral-openorca on CPU). The
+small model knows most of the trivial facts, says "I don't know" to a few and
+hedges on one; code questions skip it. The same questions run with the
+cascade off and on, and cascade_stats() gives the tier split and latency saved.
+Run: python bench_cascade.py
+"""
+import re
+import time
+import agent_loop
+import llm_client
+from bench_backends import FakeOllama
+from cascade import Cascade
+
+SMALL_MODEL = "llama3.2:1b"
+FACTS = {
+    "What is the capital of Peru?": "Lima is the capital of Peru.",
+    "Who wrote Hamlet?": "William Shakespeare wrote Hamlet.",
+    "What is the chemical symbol for gold?": "The chemical symbol for gold is Au.",
+    "How many legs does a spider have?": "A spider has eight legs.",
+    "What is the largest planet in the solar system?": "Jupiter is the largest planet.",
+    "Who painted the Mona Lisa?": "Leonardo da Vinci painted the Mona Lisa.",
+    "What is the boiling point of water in Celsius?": "Water boils at 100 degrees Celsius.",
+    "Which ocean is the largest?": "The Pacific Ocean is the largest.",
+    "What language is spoken in Brazil?": "Portuguese is spoken in Brazil.",
+    "What is the square root of 81?": "The square root of 81 is 9.",
+    "What is the capital of Burkina Faso?": "I don't know.",
+    "Who was the first Chancellor of Austria?": "I don't know.",
+    "What is the tallest mountain in Oceania?": "It might be Puncak Jaya, probably.",
+    "Write a Python function to reverse a string": "Use s[::-1] to reverse a string.",
+    "Write SQL code to count rows in a table": "SELECT COUNT(*) FROM table;",
+}
+LARGE_ANSWERS = {
+    "What is the capital of Burkina Faso?": "Ouagadougou is the capital of Burkina Faso.",
+    "Who was the first Chancellor of Austria?": "Karl Renner was the first Chancellor of Austria.",
+    "What is the tallest mountain in Oceania?": "Puncak Jaya is the tallest mountain in Oceania.",
+}
+_QUESTION = re.compile(r"Question: (.*)\nAnswer:")
+
+class FakeModels(FakeOllama):
+    def reply(self, request: dict) -> list[str]:
+        question = _QUESTION.search(request["prompt"]).group(1)
+        answer = FACTS[question]
+        if request["model"] != SMALL_MODEL:
+            answer = LARGE_ANSWERS.get(question, answer)
+        return [word + " " for word in answer.split()] + ["\n\n"]
+
+    def delay(self, request: dict) -> float:
+        return 0.005 if request["model"] == SMALL_MODEL else 0.04
+
+def run(cascade: Cascade, rounds: int = 4) -> tuple[float, dict[str, str]]:
+    agent_loop.CASCADE = cascade
+    answers = {}
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for question in FACTS:
+            answers[question] = agent_loop.llm_direct_answer(question, use_cache=False)
+    return time.perf_counter() - start, answers
+
+if __name__ == "__main__":
+    fake = FakeModels(loaded=True).start()
+    llm_client.OLLAMA_HOSTS[:] = [fake.url]
+    requests = 4 * len(FACTS)
+    off, before = run(Cascade(""))
+    print(f"MODEL_NAME only:  {requests} answers in {off:.2f} s")
+    on, after = run(Cascade(SMALL_MODEL))
+    print(f"cascade:          {requests} answers in {on:.2f} s")
+    stats = agent_loop.cascade_stats()
+    print(f"  small {stats['small']['answered']} ({stats['small']['fraction']:.0%}, "
+          f"{stats['small']['seconds_avg'] * 1000:.0f} ms avg)  "
+          f"large {stats['large']['answered']} ({stats['large']['fraction']:.0%}, "
+          f"{stats['large']['seconds_avg'] * 1000:.0f} ms avg)")
+    print(f"  escalations {stats['escalations']}")
+    print(f"  latency saved {stats['latency_saved']:.2f} s ({stats['latency_saved_avg'] * 1000:.0f} ms per answer)")
+    changed = {q for q in FACTS if before[q] != after[q]}
+    print(f"  answers that differ from MODEL_NAME's: {len(changed)}")
+    for question in sorted(changed):
+        print(f"    {question!r}: {before[question]!r} vs {after[question]!r}")
@@ -0,0 +1,100 @@
+"""
+Benchmark: the symmetric-delete index behind fuzzy city correction, at
+gazetteer scale (100k synthetic place names rather than the bundled list).
+
+Reports build time, index memory, lookup latency (median / p99) and how often
+a name with max_typos random edits is corrected back to the original. Then
+runs find_fuzzy on the bundled gazetteer over misspelled cities and over
+ordinary words in a city's place ("in parts of the country"), and exits
+non-zero if any of those is read as a city or a misspelling is missed.
+Run: python bench_fuzzy_city.py [num_names]
+"""
+import random
+import statistics
+import sys
+import time
+from gazetteer import get_gazetteer, max_typos
+from symspell import SymSpellIndex
+
+SYLLABLES = (
+    "ba ra pu na ma dh ka li ko ta ch en ha ya de va gu ja la pa sa ri no bo "
+    "ve ne to lo an ur ab ad pur gar nag bad wal kot ganj"
+).split()
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+# (question, city find_fuzzy should return, or None)
+QUESTIONS = [
+    ("weather in chenai today", "Chennai"),
+    ("hydrabad weather", "Hyderabad"),
+    ("temperature in kolkatta now", "Kolkata"),
+    ("weather for mumbaii", "Mumbai"),
+    ("will it rain in parts of the country tomorrow", None),
+    ("weather in prune", None),
+    ("weather in berth", None),
+    ("weather in romeo", None),
+    ("is it cold in the north of england", None),
+    ("will it be sunny for the weekend trip", None),
+]
+
+def synthetic_names(n: int, seed: int = 7) -> list[str]:
+    rng = random.Random(seed)
+    names: set[str] = set()
+    while len(names) < n:
+        name = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 5)))
+        if rng.random() < 0.1:
+            name += " " + "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3)))
+        names.add(name)
+    return sorted(names)
+
+def misspell(name: str, edits: int, rng: random.Random) -> str:
+    for _ in range(edits):
+        i = rng.randrange(len(name))
+        op = rng.choice(("delete", "insert", "replace", "swap"))
+        if op == "delete" and len(name) > 1:
+            name = name[:i] + name[i + 1:]
+        elif op == "insert":
+            name = name[:i] + rng.choice(LETTERS) + name[i:]
+        elif op == "swap" and i + 1 < len(name):
+            name = name[:i] + name[i + 1] + name[i] + name[i + 2:]
+        else:
+            name = name[:i] + rng.choice(LETTERS) + name[i + 1:]
+    return name
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    names = synthetic_names(n)
+
+    start = time.perf_counter()
+    index = SymSpellIndex(names, max_distance=2)
+    build = time.perf_counter() - start
+    term_bytes = sys.getsizeof(names) + sum(sys.getsizeof(name) for name in names)
+    print(f"names: {n}, variants: {len(index._keys)}")
+    print(f"build: {build:.2f} s, index arrays: {index.nbytes / 2**20:.1f} MiB (+ {term_bytes / 2**20:.1f} MiB of names)")
+
+    rng = random.Random(11)
+    queries = []
+    for name in rng.sample(names, 2000):
+        queries.append((name, misspell(name, max_typos(len(name)), rng)))
+
+    latencies = []
+    hits = 0
+    for name, query in queries:
+        start = time.perf_counter()
+        ids, _ = index.lookup(query, max_typos(len(query)))
+        latencies.append(time.perf_counter() - start)
+        hits += name in (names[i] for i in ids)
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"lookup: median {statistics.median(latencies) * 1e6:.0f} µs, p99 {p99 * 1e6:.0f} µs")
+    print(f"corrected to the original: {hits / len(queries):.1%} of {len(queries)} misspellings")
+
+    gazetteer = get_gazetteer()
+    wrong = []
+    for question, expected in QUESTIONS:
+        city = gazetteer.find_fuzzy(question)
+        if (city and city.name) != expected:
+            wrong.append((question, expected, city))
+    print(f"bundled gazetteer: {len(QUESTIONS) - len(wrong)}/{len(QUESTIONS)} questions read right")
+    for question, expected, city in wrong:
+        print(f"    {question!r}: expected {expected}, got {city}")
+    if wrong:
+        sys.exit(1)
@@ -0,0 +1,48 @@
+"""
+Benchmark: hedged direct generations against local fake Ollama servers.
+
+Two FakeOllama hosts (see bench_backends.py). Requests go one at a time, so
+the pool always picks the first host; on 3% of requests that host stalls for
+STALL seconds before its first token (modelled as a model reload). Without
+hedging those requests take the stall; with it, a second copy goes to the
+other host once the first token is later than the p95 first-token time.
+Run: python bench_hedging.py
+"""
+import statistics
+import time
+from backends import BackendPool
+from bench_backends import FakeOllama
+from hedging import HedgePolicy, hedged_stream
+from llm_client import MODEL_NAME, _make_llm
+
+REQUESTS = 400
+STALL_EVERY = 33  # about 3% of requests
+STALL = 1.0  # seconds
+
+def run(budget: float) -> tuple[list[float], HedgePolicy, list[FakeOllama]]:
+    fakes = [FakeOllama(loaded=True, tokens=5, load_delay=STALL).start(), FakeOllama(loaded=True, tokens=5).start()]
+    pool = BackendPool([f.url for f in fakes], _make_llm, MODEL_NAME)
+    policy = HedgePolicy(budget=budget)
+    latencies = []
+    for i in range(REQUESTS):
+        if i % STALL_EVERY == STALL_EVERY - 1:
+            fakes[0].loaded = False
+        start = time.perf_counter()
+        with hedged_stream(pool, lambda b: b.client.stream("Hi", options={"num_predict": 5}), policy) as stream:
+            "".join(stream)
+        latencies.append(time.perf_counter() - start)
+        time.sleep(0.01)  # let an abandoned copy's host finish before the next request
+    for fake in fakes:
+        fake.stop()
+    return latencies, policy, fakes
+
+def show(label: str, latencies: list[float], policy: HedgePolicy, fakes: list[FakeOllama]):
+    ordered = sorted(latencies)
+    stats = policy.stats()
+    print(f"{label}: p50 {statistics.median(ordered) * 1000:.0f} ms  p99 {ordered[int(len(ordered) * 0.99)] * 1000:.0f} ms  "
+          f"max {ordered[-1] * 1000:.0f} ms  hedges fired {stats['fired']} won {stats['won']}  "
+          f"extra load {stats['fire_rate']:.1%}  generations per host {[f.generations for f in fakes]}")
+
+if __name__ == "__main__":
+    show("no hedging ", *run(budget=0.0))
+    show("LLM_HEDGE=1", *run(budget=0.05))
@@ -0,0 +1,57 @@
+"""
+Cold-start import cost, measured like `python -X importtime`.
+
+Each module is imported in a fresh interpreter with -X importtime; the report
+shows the module's cumulative import time and the heaviest imports under it.
+Importing demo_app runs the Streamlit script outside `streamlit run`, which
+only logs warnings.
+Run: python bench_import.py [module ...] [--top N] [--repeat N]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def import_times(module: str) -> dict[str, int]:
+    """Cumulative import time in microseconds per imported module, from one fresh process."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=HERE, capture_output=True, text=True,
+    )
+    times: dict[str, int] = {}
+    errors = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            errors.append(line)
+        elif "cumulative" not in line:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            times[name.strip()] = int(cumulative)
+    # A failed import still prints timings for the part that ran
+    if proc.returncode != 0 or module not in times:
+        raise RuntimeError(f"import {module} failed (exit {proc.returncode}):\n" + "\n".join(errors)[-2000:])
+    return times
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("modules", nargs="*", default=["agent_loop", "demo_app"])
+    parser.add_argument("--top", type=int, default=8, help="heaviest imports to list")
+    parser.add_argument("--repeat", type=int, default=3, help="fresh processes per module (median reported)")
+    args = parser.parse_args()
+    failed = False
+    for module in args.modules:
+        try:
+            runs = [import_times(module) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"{module}: FAILED, {e}")
+            failed = True
+            continue
+        total = statistics.median(r[module] for r in runs)
+        print(f"{module}: {total / 1000:.1f} ms cumulative (median of {args.repeat})")
+        last = runs[-1]
+        heaviest = sorted((t, n) for n, t in last.items() if n != module and "." not in n)[-args.top:]
+        for t, name in reversed(heaviest):
+            print(f"    {t / 1000:8.1f} ms  {name}")
+    sys.exit(1 if failed else 0)
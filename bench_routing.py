@@ -0,0 +1,150 @@
+"""
+Microbenchmark: per-request cost of the routing predicates.
+
+"before" re-implements the original predicates (one lower() and one substring
+scan per keyword list each); "after" is the single-pass matcher in routing.py.
+Run: python bench_routing.py
+"""
+import re
+import timeit
+import routing
+from agent_loop import detect_category, get_weather_intent, is_time_sensitive, is_weather_related
+
+QUESTIONS = [
+    "What's the weather in Mumbai today?",
+    "Will it rain tomorrow in Pune?",
+    "Is it going to be windy in Chennai tonight?",
+    "weather forecast for Delhi this week",
+    "Who won IPL 2023?",
+    "Who won the FIFA World Cup in 2022?",
+    "Who is the current prime minister of India?",
+    "What is the capital of France?",
+    "Write a Python function to reverse a string",
+    "How does photosynthesis work?",
+    "Explain the difference between TCP and UDP in simple terms for a beginner",
+    "Who is the president of the United States?",
+]
+
+# --- Original predicates, kept verbatim for comparison ---
+def legacy_detect_category(question: str) -> str:
+    q = question.lower()
+    if any(word in q for word in [
+        "weather", "temperature", "humidity", "rain", "forecast", "climate", "wind", "sunny", "cloudy", "storm", "snow"
+    ]):
+        return "Weather"
+    if any(word in q for word in [
+        "ipl", "cricket", "football", "soccer", "tennis", "nba", "nfl", "fifa", "world cup", "sports", "score", "match", "player", "tournament"
+    ]):
+        return "Sports"
+    if any(word in q for word in [
+        "prime minister", "president", "government", "election", "vote", "parliament", "politics", "minister", "mla", "mp", "political", "party"
+    ]):
+        return "Politics"
+    if any(word in q for word in [
+        "history", "science", "math", "who", "what", "when", "where", "why", "how", "population", "country", "general knowledge"
+    ]):
+        return "General Knowledge"
+    return "Other"
+
+def legacy_get_weather_intent(question: str) -> str | None:
+    q = question.lower()
+    # Rain intent
+    if (
+        ("rain" in q and any(t in q for t in ["today", "tomorrow", "tonight", "now"]))
+        or re.search(r"(gonna|going to) rain", q)
+        or re.search(r"will it rain", q)
+        or re.search(r"chance of rain", q)
+        or re.search(r"rain expected", q)
+        or re.search(r"raining today", q)
+        or re.search(r"precipitation", q)
+    ):
+        return "rain"
+    # Sunny intent
+    if (
+        ("sunny" in q and any(t in q for t in ["today", "tomorrow", "tonight", "now"]))
+        or re.search(r"(gonna|going to) be sunny", q)
+        or re.search(r"will it be sunny", q)
+        or re.search(r"sunny expected", q)
+        or re.search(r"clear skies", q)
+    ):
+        return "sunny"
+    # Cloudy intent
+    if (
+        ("cloudy" in q and any(t in q for t in ["today", "tomorrow", "tonight", "now"]))
+        or re.search(r"(gonna|going to) be cloudy", q)
+        or re.search(r"will it be cloudy", q)
+        or re.search(r"cloudy expected", q)
+        or re.search(r"overcast", q)
+        or re.search(r"clouds", q)
+    ):
+        return "cloudy"
+    # Windy intent
+    if (
+        ("windy" in q and any(t in q for t in ["today", "tomorrow", "tonight", "now"]))
+        or re.search(r"(gonna|going to) be windy", q)
+        or re.search(r"will it be windy", q)
+        or re.search(r"windy expected", q)
+        or re.search(r"strong winds", q)
+        or re.search(r"gusty", q)
+        or re.search(r"wind speed", q)
+    ):
+        return "windy"
+    # Snow intent
+    if (
+        ("snow" in q and any(t in q for t in ["today", "tomorrow", "tonight", "now"]))
+        or re.search(r"(gonna|going to) snow", q)
+        or re.search(r"will it snow", q)
+        or re.search(r"chance of snow", q)
+        or re.search(r"snow expected", q)
+    ):
+        return "snow"
+    return None
+
+def legacy_is_weather_related(question: str) -> bool:
+    keywords = [
+        "weather", "temperature", "humidity", "rain", "wind", "forecast",
+        "sunny", "cloudy", "storm", "snow", "precipitation", "climate"
+    ]
+    return any(word in question.lower() for word in keywords)
+
+def legacy_is_time_sensitive(question: str) -> bool:
+    q = question.lower()
+    if re.search(r"\b(19|20)\d{2}\b", q):
+        return True
+    keywords = [
+        "who won", "winner", "final", "score", "beat", "defeat", "defeated",
+        "trophy", "title", "champion", "match", "fixture", "result",
+        "ipl", "fifa", "world cup", "uefa", "olympics", "nba", "nfl", "mlb", "nhl", "grand slam",
+        "nobel", "oscars", "academy awards", "emmys", "grammys", "ballon d'or", "golden globes",
+        "president", "prime minister", "chief minister", "current", "mla", "mp", "member of parliament",
+        "election", "vote", "polls"
+    ]
+    return any(term in q for term in keywords)
+
+def route_before(q: str):
+    return (
+        legacy_detect_category(q), legacy_get_weather_intent(q), legacy_is_weather_related(q),
+        legacy_is_time_sensitive(q), "forecast" in q.lower(),
+    )
+
+def route_after(q: str):
+    return (
+        detect_category(q), get_weather_intent(q), is_weather_related(q),
+        is_time_sensitive(q), routing.scan_question(q).has("forecast"),
+    )
+
+def route_after_uncached(q: str):
+    # Same as route_after but forces a fresh scan, i.e. a question seen for the first time
+    routing.scan_question.cache_clear()
+    return route_after(q)
+
+if __name__ == "__main__":
+    # Differences are expected where whole-word matching fixes a substring false positive
+    mismatches = [q for q in QUESTIONS if route_before(q) != route_after(q)]
+    print(f"questions routed differently: {len(mismatches)}/{len(QUESTIONS)}")
+    for q in mismatches:
+        print(f"  {q!r}: {route_before(q)} vs {route_after(q)}")
+    n = 2000
+    for name, fn in (("before", route_before), ("after", route_after_uncached)):
+        secs = min(timeit.repeat(lambda: [fn(q) for q in QUESTIONS], number=n, repeat=5))
+        print(f"{name:>6}: {secs / (n * len(QUESTIONS)) * 1e6:7.2f} µs per request")
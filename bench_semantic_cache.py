@@ -0,0 +1,76 @@
+"""
+Check: semantic cache hits and misses with the offline HashingEmbedder.
+
+Stores a few questions, then looks up variants that should hit (the same
+question with other casing, punctuation or contractions) and near-misses that
+must not (same shape, different fact: "boiling point of milk" against "of
+water"). Prints hits and false hits per threshold and exits non-zero if the
+default SEMANTIC_CACHE_THRESHOLD serves a wrong answer or misses a trivial
+variant. Also times lookups in a full cache.
+Run: python bench_semantic_cache.py
+"""
+import sys
+import timeit
+from semantic_cache import HashingEmbedder, SemanticCache
+
+DEFAULT_THRESHOLD = 0.92
+STORED = [
+    "What is the capital of France?",
+    "Who wrote Hamlet?",
+    "How many legs does a spider have?",
+    "What is the boiling point of water?",
+    "Who painted the Mona Lisa?",
+]
+# (lookup, stored question it should return); the default threshold must hit these
+SAME = [
+    ("what is the capital of France", "What is the capital of France?"),
+    ("WHO WROTE HAMLET", "Who wrote Hamlet?"),
+    ("How many legs does a spider have", "How many legs does a spider have?"),
+    ("who painted the mona lisa?!", "Who painted the Mona Lisa?"),
+]
+# Rephrasings a real embedding model should catch; the hashing embedder only sometimes does
+REPHRASED = [
+    ("What's the capital of France?", "What is the capital of France?"),
+    ("Who wrote the play Hamlet?", "Who wrote Hamlet?"),
+    ("How many legs do spiders have?", "How many legs does a spider have?"),
+]
+# Different questions; a hit here serves a wrong answer
+DIFFERENT = [
+    "What is the capital of Germany?",
+    "Who wrote Macbeth?",
+    "How many legs does an ant have?",
+    "What is the boiling point of milk?",
+    "What is the freezing point of water?",
+    "Who painted the Sistine Chapel?",
+]
+
+def build(threshold: float) -> SemanticCache:
+    cache = SemanticCache(HashingEmbedder(), threshold=threshold)
+    for question in STORED:
+        cache.add(question, question)
+    return cache
+
+def score(cache: SemanticCache) -> tuple[int, int, int]:
+    """(SAME hits, REPHRASED hits, DIFFERENT false hits)."""
+    def hits(pairs):
+        return sum((cache.lookup(q) or (None,))[0] == expected for q, expected in pairs)
+    return hits(SAME), hits(REPHRASED), sum(cache.lookup(q) is not None for q in DIFFERENT)
+
+if __name__ == "__main__":
+    print(f"{'threshold':>9}  same  rephrased  false hits")
+    for threshold in (0.70, 0.80, 0.85, DEFAULT_THRESHOLD, 0.97):
+        same, rephrased, false_hits = score(build(threshold))
+        print(f"{threshold:>9.2f}  {same}/{len(SAME)}  {rephrased}/{len(REPHRASED):<8}  {false_hits}/{len(DIFFERENT)}")
+
+    full = SemanticCache(HashingEmbedder(), threshold=DEFAULT_THRESHOLD, max_entries=2048)
+    for i in range(2048):
+        full.add(f"question number {i} about topic {i * 7919 % 1000}", str(i))
+    runs = 2000
+    secs = timeit.timeit(lambda: full.lookup("What is the boiling point of water?"), number=runs)
+    print(f"lookup in a full cache (2048 entries): {secs / runs * 1e6:.0f} us")
+
+    same, _, false_hits = score(build(DEFAULT_THRESHOLD))
+    if same != len(SAME) or false_hits:
+        print(f"FAIL at {DEFAULT_THRESHOLD}: {same}/{len(SAME)} variants hit, {false_hits} wrong answers served")
+        sys.exit(1)
+    print(f"OK at {DEFAULT_THRESHOLD}: every variant hit, no wrong answers")
@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any
+import zstandard
+
+class TieredCache:
+    """
+    Two-tier key/value cache for JSON-serialisable values.
+    - Front: bounded in-memory LRU.
+    - Back: SQLite file with zstd-compressed payloads that survives restarts.
+    Entries expire after a per-namespace TTL (seconds). Pass path=None for memory only.
+    """
+
+    def __init__(self, path: str | None, max_entries: int = 1024, ttls: dict[str, float] | None = None,
+                 default_ttl: float = 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttls = dict(ttls or {})
+        self.default_ttl = default_ttl
+        self.counters: Counter = Counter()
+        self._mem: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        self._zc = zstandard.ZstdCompressor(level=3)
+        self._zd = zstandard.ZstdDecompressor()
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _conn(self) -> sqlite3.Connection | None:
+        # Opened on first use so importing the tools never touches the disk
+        if self._db is None and self.path:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "ns TEXT NOT NULL, key TEXT NOT NULL, expires REAL NOT NULL, value BLOB NOT NULL, "
+                "PRIMARY KEY (ns, key))"
+            )
+            self._db = db
+        return self._db
+
+    def get(self, namespace: str, key: str) -> Any | None:
+        now = time.time()
+        with self._lock:
+            item = self._mem.get((namespace, key))
+            if item is not None:
+                expires, value = item
+                if expires > now:
+                    self._mem.move_to_end((namespace, key))
+                    self.counters[namespace, "memory_hits"] += 1
+                    return value
+                del self._mem[(namespace, key)]
+                self.counters[namespace, "expired"] += 1
+            db = self._conn()
+            if db is not None:
+                row = db.execute("SELECT expires, value FROM cache WHERE ns = ? AND key = ?", (namespace, key)).fetchone()
+                if row is not None:
+                    expires, blob = row
+                    if expires > now:
+                        value = json.loads(self._zd.decompress(blob))
+                        self._remember(namespace, key, expires, value)
+                        self.counters[namespace, "disk_hits"] += 1
+                        return value
+                    db.execute("DELETE FROM cache WHERE ns = ? AND key = ?", (namespace, key))
+                    db.commit()
+                    self.counters[namespace, "expired"] += 1
+            self.counters[namespace, "misses"] += 1
+            return None
+
+    def set(self, namespace: str, key: str, value: Any, ttl: float | None = None):
+        if ttl is None:
+            ttl = self.ttls.get(namespace, self.default_ttl)
+        expires = time.time() + ttl
+        with self._lock:
+            self._remember(namespace, key, expires, value)
+            db = self._conn()
+            if db is not None:
+                blob = self._zc.compress(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+                db.execute(
+                    "INSERT OR REPLACE INTO cache (ns, key, expires, value) VALUES (?, ?, ?, ?)",
+                    (namespace, key, expires, blob),
+                )
+                db.commit()
+            self.counters[namespace, "sets"] += 1
+
+    def _remember(self, namespace: str, key: str, expires: float, value: Any):
+        self._mem[(namespace, key)] = (expires, value)
+        self._mem.move_to_end((namespace, key))
+        while len(self._mem) > self.max_entries:
+            (ns, _), _ = self._mem.popitem(last=False)
+            self.counters[ns, "evictions"] += 1
+
+    def purge_expired(self) -> int:
+        """Drop expired rows from the disk tier; returns how many were removed."""
+        with self._lock:
+            db = self._conn()
+            if db is None:
+                return 0
+            cur = db.execute("DELETE FROM cache WHERE expires <= ?", (time.time(),))
+            db.commit()
+            return cur.rowcount
+
+    def clear(self, namespace: str | None = None):
+        with self._lock:
+            if namespace is None:
+                self._mem.clear()
+            else:
+                for k in [k for k in self._mem if k[0] == namespace]:
+                    del self._mem[k]
+            db = self._conn()
+            if db is not None:
+                if namespace is None:
+                    db.execute("DELETE FROM cache")
+                else:
+                    db.execute("DELETE FROM cache WHERE ns = ?", (namespace,))
+                db.commit()
+
+    def stats(self) -> dict:
+        """
+        {"memory_entries": n, "namespaces": {ns: {counter: count}}} with counters
+        memory_hits, disk_hits, misses, sets, evictions and expired.
+        """
+        namespaces: dict[str, dict[str, int]] = {}
+        with self._lock:
+            for (ns, name), count in self.counters.items():
+                namespaces.setdefault(ns, {})[name] = count
+            return {"memory_entries": len(self._mem), "namespaces": namespaces}
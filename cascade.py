@@ -0,0 +1,126 @@
+import os
+import re
+import threading
+from collections import Counter
+from routing import scan_question
+
+# Small-model answers scoring under this (0-1, see answer_confidence) are asked again of MODEL_NAME
+CASCADE_MIN_CONFIDENCE = float(os.getenv("CASCADE_MIN_CONFIDENCE", "0.6"))
+# Questions longer than this many words skip the small model
+HARD_QUESTION_WORDS = 30
+
+ESCALATIONS = ("hard", "dont_know", "low_confidence", "error")
+
+_DONT_KNOW = re.compile(
+    r"\b(?:don'?t|do not|doesn'?t|does not)\s+know\b|\bnot\s+(?:sure|certain)\b|\bunknown\b"
+    r"|\bno\s+(?:information|idea|data)\b|\b(?:cannot|can'?t|unable to)\s+(?:answer|say|determine|provide|find)\b",
+    re.I,
+)
+_HEDGES = re.compile(
+    r"\b(?:i think|i believe|i guess|probably|possibly|perhaps|maybe|might|likely|it seems|as of my)\b", re.I,
+)
+_WORD = re.compile(r"[a-z0-9]+")
+_FILLER = frozenset(
+    "a an the is are was were be of in on at to for by from with and or it its this that which who whom whose "
+    "what when where how".split()
+)
+
+def is_hard(question: str) -> bool:
+    """Code, multi-step and long questions, which the small model is not trusted with."""
+    return scan_question(question).has("hard") or len(question.split()) > HARD_QUESTION_WORDS
+
+def says_dont_know(answer: str) -> bool:
+    return _DONT_KNOW.search(answer) is not None
+
+def answer_confidence(question: str, answer: str) -> float:
+    """
+    0-1 heuristic for a one-sentence answer (Ollama streams no token
+    probabilities here): 0.4 off per hedging phrase ("probably", "I think"),
+    0.5 off when it adds no word the question did not already have, 0.3 off
+    when it stopped mid-sentence (ran out of tokens).
+    """
+    score = 1.0
+    score -= 0.4 * len(_HEDGES.findall(answer))
+    asked = set(_WORD.findall(question.lower()))
+    if not set(_WORD.findall(answer.lower())) - asked - _FILLER:
+        score -= 0.5
+    if not answer.rstrip().endswith((".", "!", "?")):
+        score -= 0.3
+    return max(score, 0.0)
+
+class Cascade:
+    """
+    Small model first for direct answers: a question that is not is_hard()
+    goes to `small_model`, whose answer stands unless it says it does not know
+    or scores under `min_confidence`; then MODEL_NAME answers it. Keeps how
+    many answers each tier gave and how long their generations took, to
+    estimate the latency saved. An empty small_model turns the cascade off.
+    """
+
+    def __init__(self, small_model: str, min_confidence: float = CASCADE_MIN_CONFIDENCE):
+        self.small_model = small_model
+        self.min_confidence = min_confidence
+        self._lock = threading.Lock()
+        self._stats: Counter = Counter()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.small_model)
+
+    def escalation(self, question: str, answer: str | None = None) -> str | None:
+        """
+        Why MODEL_NAME should answer instead ("hard", "dont_know" or
+        "low_confidence"), or None to keep the small model. Without `answer`,
+        only the question is judged.
+        """
+        if answer is None:
+            return "hard" if is_hard(question) else None
+        if says_dont_know(answer):
+            return "dont_know"
+        if answer_confidence(question, answer) < self.min_confidence:
+            return "low_confidence"
+        return None
+
+    def record(self, tier: str, seconds: float):
+        """One answer from `tier` ("small" or "large"), generated in `seconds`."""
+        with self._lock:
+            self._stats[tier, "answered"] += 1
+            self._stats[tier, "seconds"] += seconds
+
+    def record_escalation(self, reason: str, wasted: float = 0.0):
+        """
+        A question passed to MODEL_NAME (reason "error" when the small model
+        failed), after `wasted` seconds on a small-model answer that was dropped.
+        """
+        with self._lock:
+            self._stats["escalated", reason] += 1
+            self._stats["escalated", "seconds"] += wasted
+
+    def stats(self) -> dict:
+        """
+        Per tier answered / fraction / seconds_avg, escalations by reason, and
+        latency_saved: small answers x the average large-model time, minus the
+        time spent on the small model (None until the large model has answered).
+        """
+        with self._lock:
+            answered = {tier: self._stats[tier, "answered"] for tier in ("small", "large")}
+            seconds = {tier: self._stats[tier, "seconds"] for tier in ("small", "large")}
+            total = sum(answered.values())
+            tiers = {
+                tier: {
+                    "answered": answered[tier],
+                    "fraction": answered[tier] / total if total else 0.0,
+                    "seconds_avg": seconds[tier] / answered[tier] if answered[tier] else 0.0,
+                }
+                for tier in ("small", "large")
+            }
+            saved = None
+            if answered["large"]:
+                saved = (answered["small"] * tiers["large"]["seconds_avg"]
+                         - seconds["small"] - self._stats["escalated", "seconds"])
+            return {
+                **tiers,
+                "escalations": {reason: self._stats["escalated", reason] for reason in ESCALATIONS},
+                "latency_saved": saved,
+                "latency_saved_avg": saved / total if saved is not None and total else None,
+            }
@@ -0,0 +1,7 @@
+"""
+Loads .env into os.environ once per process. Modules that read settings with
+os.getenv import this first.
+"""
+from dotenv import load_dotenv
+
+load_dotenv()
@@ -0,0 +1,118 @@
+import math
+import re
+import zlib
+from collections import Counter
+import numpy as np
+
+# Passages are sentences of the web search text: SerpAPI snippets and titles are
+# joined with spaces and a Wikipedia extract is plain prose, so sentence
+# boundaries are the only reliable seams.
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[A-Z0-9])")
+_WORD = re.compile(r"\w+")
+
+# Too common to say anything about relevance; dropped from BM25 terms and shingles
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the this to was were what when "
+    "where which who whom why will with how did does do".split()
+)
+
+def estimate_tokens(text: str) -> int:
+    """Rough prompt-token count (about four characters per token for English text)."""
+    return (len(text) + 3) // 4
+
+def split_passages(text: str) -> list[str]:
+    return [p.strip() for p in _SENTENCE_SPLIT.split(text) if p.strip()]
+
+def _terms(text: str) -> list[str]:
+    return [w for w in _WORD.findall(text.lower()) if w not in STOPWORDS]
+
+# --- Near-duplicate removal (MinHash over word shingles) ---
+SHINGLE_SIZE = 3
+NUM_PERM = 64
+# Multiply-shift hashing: the high 32 bits of (a*h + b) mod 2**64, odd a
+_rng = np.random.default_rng(1)
+_PERM_A = _rng.integers(0, 1 << 64, NUM_PERM, dtype=np.uint64, endpoint=False) | np.uint64(1)
+_PERM_B = _rng.integers(0, 1 << 64, NUM_PERM, dtype=np.uint64, endpoint=False)
+
+def _shingles(text: str) -> set[str]:
+    words = _terms(text)
+    if len(words) < SHINGLE_SIZE:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+def minhash(text: str) -> np.ndarray:
+    """NUM_PERM-slot MinHash signature of the text's word shingles."""
+    shingles = _shingles(text)
+    if not shingles:
+        return np.full(NUM_PERM, 1 << 32, dtype=np.uint64)
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+    # uint64 arithmetic wraps, which is the mod 2**64
+    return ((np.outer(hashes, _PERM_A) + _PERM_B) >> np.uint64(32)).min(axis=0)
+
+def dedupe(passages: list[str], threshold: float = 0.7) -> list[str]:
+    """
+    Drop passages whose estimated shingle Jaccard similarity to an earlier kept
+    passage reaches `threshold`. Earlier passages win, so SerpAPI's priority order holds.
+    """
+    kept: list[str] = []
+    signatures: list[np.ndarray] = []
+    for passage in passages:
+        sig = minhash(passage)
+        if signatures and float(np.max(np.mean(np.asarray(signatures) == sig, axis=1))) >= threshold:
+            continue
+        kept.append(passage)
+        signatures.append(sig)
+    return kept
+
+# --- Relevance ranking (BM25 over the passages) ---
+def bm25_scores(query: str, passages: list[str], k1: float = 1.5, b: float = 0.75) -> list[float]:
+    docs = [_terms(p) for p in passages]
+    if not docs:
+        return []
+    avg_len = sum(len(d) for d in docs) / len(docs) or 1.0
+    df = Counter(t for d in docs for t in set(d))
+    n = len(docs)
+    query_terms = set(_terms(query))
+    scores = []
+    for doc in docs:
+        tf = Counter(doc)
+        norm = k1 * (1 - b + b * len(doc) / avg_len)
+        score = 0.0
+        for term in query_terms:
+            if term in tf:
+                idf = math.log(1 + (n - df[term] + 0.5) / (df[term] + 0.5))
+                score += idf * tf[term] * (k1 + 1) / (tf[term] + norm)
+        scores.append(score)
+    return scores
+
+def pack_context(query: str, text: str, budget: int, dedupe_threshold: float = 0.7) -> tuple[str, dict]:
+    """
+    Fit web search text into about `budget` tokens: split into sentences, drop
+    near-duplicates, rank by BM25 against `query` and greedily take the best
+    passages that still fit. Kept passages are returned in their original order.
+    Returns (packed text, stats).
+    """
+    passages = split_passages(text)
+    unique = dedupe(passages, dedupe_threshold)
+    scores = bm25_scores(query, unique)
+    order = sorted(range(len(unique)), key=lambda i: (-scores[i], i))
+    chosen: list[int] = []
+    used = 0
+    for i in order:
+        cost = estimate_tokens(unique[i]) + 1
+        if used + cost <= budget:
+            chosen.append(i)
+            used += cost
+    if not chosen and order:
+        # Even the best passage is over budget: keep its head rather than nothing
+        packed = unique[order[0]][:budget * 4].rsplit(" ", 1)[0]
+    else:
+        packed = " ".join(unique[i] for i in sorted(chosen))
+    stats = {
+        "passages": len(passages),
+        "duplicates": len(passages) - len(unique),
+        "kept": len(chosen) or int(bool(order)),
+        "tokens_before": estimate_tokens(text),
+        "tokens_after": estimate_tokens(packed),
+    }
+    return packed, stats
@@ -1,8 +1,10 @@
 import streamlit as st
 from datetime import datetime
-import time
-import re
-from agent_loop import agent_streamlit_response
+import uuid
+from agent_loop import agent_streamlit_stream
+from http_client import get_session
+from llm_client import WARMUP_ON_START, get_llm, llm_status, start_warmup
+from tools import PREWARM_ON_START, prewarm_connections
 
 st.set_page_config(page_title="⚡🧠 Raychel AI: Autonomous Reasoning Agent", page_icon="🤖", layout="centered")
 st.markdown("""
@@ -161,27 +163,40 @@ st.markdown("""
 
 st.write("")
 
-def format_weather_forecast(text: str) -> str:
-    """
-    Format a weather forecast string for nice display.
-    """
-    first_period = text.find(".")
-    summary = text
-    forecast = ""
-    if first_period != -1:
-        summary = text[:first_period+1]
-        forecast = text[first_period+1:]
-    forecast_lines = []
-    for match in re.finditer(r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}): ([^,]+), ([\d\.]+°C)", forecast):
-        dt, desc, temp = match.groups()
-        forecast_lines.append(f"- `{dt}`: {desc}, **{temp}**")
-    if forecast_lines:
-        return f"{summary}\n\n**Forecast:**\n" + "\n".join(forecast_lines)
-    neat = re.sub(r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}):", r"\n- `\1`:", text)
-    return neat
+@st.cache_resource
+def _prewarm_http():
+    # Runs once per server process, not once per rerun
+    if PREWARM_ON_START:
+        prewarm_connections()
+    return True
+
+@st.cache_resource(show_spinner=False)
+def _shared_clients():
+    # One LLM client and HTTP pool per server process, shared by all sessions.
+    # Built on the first question rather than on page load.
+    return get_llm(), get_session()
+
+@st.cache_resource
+def _start_model_warmup():
+    # Loads the model in the background so the first user doesn't pay the cold start
+    if WARMUP_ON_START:
+        start_warmup()
+    return True
+
+_prewarm_http()
+_start_model_warmup()
+
+_model = llm_status()
+if WARMUP_ON_START and _model["state"] in ("cold", "warming"):
+    st.info("⏳ Warming up the language model. Weather answers are ready now; AI answers may be slow for a moment.")
+elif _model["state"] == "error":
+    st.warning("⚠️ The language model server is not reachable yet; AI answers may fail until it is back.")
 
 if "chat_history" not in st.session_state:
     st.session_state.chat_history = []
+if "session_id" not in st.session_state:
+    # Lets the LLM scheduler take turns between browser sessions
+    st.session_state.session_id = uuid.uuid4().hex
 
 with st.form("chat_form", clear_on_submit=True):
     user_input = st.text_input(
@@ -191,13 +206,28 @@ with st.form("chat_form", clear_on_submit=True):
     submit = st.form_submit_button("Ask")
 
 if submit and user_input:
-    start_time = time.time()
-    answer, category, tool = agent_streamlit_response(user_input)
-    elapsed = time.time() - start_time
+    _shared_clients()
     timestamp = datetime.now().strftime("%H:%M")
+    tokens, meta = agent_streamlit_stream(user_input, session_id=st.session_state.session_id)
+    # Render tokens as they arrive, then hand over to the formatted history below
+    live = st.empty()
+    with live.container():
+        st.markdown(
+            f'<div class="bubble-user-new"><span class="user-label">You:</span>{user_input}'
+            f'<span class="timestamp">{timestamp}</span></div>',
+            unsafe_allow_html=True,
+        )
+        st.markdown('<div class="bubble-agent-new"><span class="agent-label">🤖 Agent:</span></div>', unsafe_allow_html=True)
+        st.write_stream(tokens)
+    live.empty()
+    answer, category, tool = meta["answer"], meta["category"], meta["tool"]
+    timings = meta["timings"]
+    elapsed = timings["total"]
+    first_token = timings.get("first_token", elapsed)
     # Insert new messages at the top (index 0) for newest-first chat order
     st.session_state.chat_history.insert(0, {
-        "role": "agent", "text": answer, "category": category, "tool": tool, "time": timestamp, "elapsed": elapsed
+        "role": "agent", "text": answer, "category": category, "tool": tool, "time": timestamp,
+        "elapsed": elapsed, "first_token": first_token, "markdown": meta.get("markdown")
     })
     st.session_state.chat_history.insert(0, {
         "role": "user", "text": user_input, "category": category, "time": timestamp
@@ -211,7 +241,10 @@ for idx, msg in enumerate(st.session_state.chat_history):
         bubble_class += "-new"
     field_html = f'<span class="category-label">Field: {msg.get("category", "Unknown")}</span>'
     tool_html = f'<span class="tool-label">Tool: {msg.get("tool", "Unknown")}</span>' if msg["role"] == "agent" else ""
-    time_html = f'<span class="time-label">Time taken: {msg.get("elapsed",0):.2f}s</span>' if msg["role"] == "agent" else ""
+    time_html = (
+        f'<span class="time-label">First token: {msg.get("first_token", msg.get("elapsed", 0)):.2f}s'
+        f' • Total: {msg.get("elapsed", 0):.2f}s</span>'
+    ) if msg["role"] == "agent" else ""
     separator = '<span style="color:#888;padding:0 6px;">•</span>'
     meta_html = separator.join(filter(None, [field_html, tool_html, time_html]))
     if msg["role"] == "user":
@@ -221,9 +254,8 @@ for idx, msg in enumerate(st.session_state.chat_history):
             unsafe_allow_html=True,
         )
     else:
-        agent_text = msg["text"]
-        if msg.get("tool", "").lower() == "weather":
-            agent_text = format_weather_forecast(agent_text)
+        # Weather answers come with Markdown rendered from the structured report
+        agent_text = msg.get("markdown") or msg["text"]
         st.markdown(
             f'<div class="{bubble_class}"><span class="agent-label">🤖 Agent:</span></div>',
             unsafe_allow_html=True,
@@ -0,0 +1,45 @@
+"""
+Routing accuracy on the labelled corpus in routing_corpus.jsonl.
+
+Each line is {"question": ..., "route": "weather" | "search" | "llm"}. The
+report compares the original substring predicates ("before", kept in
+bench_routing.py) with the current router, and counts how many questions are
+misrouted to the expensive path (SerpAPI + llm_compose_answer).
+Run: python eval_routing.py [corpus.jsonl]
+"""
+import json
+import sys
+from agent_loop import plan_response
+from bench_routing import legacy_get_weather_intent, legacy_is_time_sensitive, legacy_is_weather_related
+
+def route_before(question: str) -> str:
+    if legacy_get_weather_intent(question) or legacy_is_weather_related(question):
+        return "weather"
+    if legacy_is_time_sensitive(question):
+        return "search"
+    return "llm"
+
+def route_after(question: str) -> str:
+    route = plan_response(question)["route"]
+    if route in ("search", "llm"):
+        return route
+    # "reply" asks for a city the question may well have named ("weather in Nice")
+    return "reply" if route == "reply" else "weather"
+
+def evaluate(rows: list[dict], router) -> dict:
+    wrong = [r for r in rows if router(r["question"]) != r["route"]]
+    expensive = [r for r in wrong if router(r["question"]) == "search"]
+    return {"total": len(rows), "wrong": wrong, "expensive": expensive}
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else "routing_corpus.jsonl"
+    with open(path, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    for name, router in (("before", route_before), ("after", route_after)):
+        res = evaluate(rows, router)
+        print(
+            f"{name:>6}: {len(res['wrong'])}/{res['total']} misrouted, "
+            f"{len(res['expensive'])} sent to search + compose by mistake"
+        )
+        for r in res["wrong"]:
+            print(f"        {r['route']:>7} -> {router(r['question']):<7} {r['question']}")
@@ -0,0 +1,214 @@
+import os
+import re
+import threading
+import unicodedata
+from typing import TYPE_CHECKING
+
+# symspell pulls in numpy; it is imported when the first misspelling is looked up
+if TYPE_CHECKING:
+    from symspell import SymSpellIndex
+
+# Bundled city list: name, country, lat, lon, population and ;-separated aliases, tab-separated
+GAZETTEER_PATH = os.getenv("GAZETTEER_PATH") or os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "data", "cities.tsv"
+)
+
+# Words after which a place name is most likely the city being asked about
+PLACE_PREPOSITIONS = frozenset({"in", "for", "at", "to", "of", "near", "around"})
+# ... and words a place name comes right before ("chenai weather")
+PLACE_FOLLOWERS = frozenset({"weather", "forecast", "temperature"})
+# A misspelled name must end the question or stop at one of these ("in chenai today"),
+# so "in parts of the country" is not read as a misspelled "paris"
+PLACE_ENDS = PLACE_PREPOSITIONS | PLACE_FOLLOWERS | {
+    "today", "tomorrow", "tonight", "now", "this", "next", "week", "weekend", "right", "currently",
+}
+# find_fuzzy tries the words around at most this many of those cues, so a question
+# full of "in"s costs a few index lookups rather than one per word
+FUZZY_MAX_CUES = 3
+
+def max_typos(length: int) -> int:
+    """
+    Edit distance a misspelled name of this length may be corrected across.
+    Names under six letters are never corrected: too many ordinary words are
+    one edit from one ("prune" / Pune, "berth" / Perth, "romeo" / Rome).
+    """
+    if length <= 5:
+        return 0
+    return 1 if length <= 8 else 2
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_END = ""  # trie key holding the city a complete name maps to
+
+class City:
+    """A place to look up weather for. Cities from the gazetteer carry coordinates; guesses only a name."""
+
+    __slots__ = ("name", "country", "lat", "lon", "population")
+
+    def __init__(self, name: str, country: str = "", lat: float | None = None, lon: float | None = None,
+                 population: int = 0):
+        self.name = name
+        self.country = country
+        self.lat = lat
+        self.lon = lon
+        self.population = population
+
+    @property
+    def has_coords(self) -> bool:
+        return self.lat is not None and self.lon is not None
+
+    def __str__(self) -> str:
+        return self.name
+
+    def __repr__(self) -> str:
+        return f"City({self.name!r}, {self.country!r}, {self.lat}, {self.lon})"
+
+def normalize(text: str) -> str:
+    """Lower-case ASCII folding: "São Paulo" -> "sao paulo"."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN.findall(normalize(text))
+
+class Gazetteer:
+    """
+    City names and aliases compiled into a token trie. scan() walks the question's
+    tokens once, taking the longest name starting at each position, so
+    "new york city" wins over "new york" and "york" alone never matches.
+    """
+
+    def __init__(self, cities: list[City], names: list[tuple[str, City]]):
+        self.cities = cities
+        self._trie: dict = {}
+        for name, city in names:
+            node = self._trie
+            for token in tokenize(name):
+                node = node.setdefault(token, {})
+            current = node.get(_END)
+            # Same spelling for two places: the bigger one wins
+            if current is None or city.population > current.population:
+                node[_END] = city
+        self._names = [(" ".join(tokenize(name)), city) for name, city in names]
+        self._fuzzy: "SymSpellIndex | None" = None
+
+    @property
+    def fuzzy(self) -> "SymSpellIndex":
+        """Symmetric-delete index over every name and alias, built on first use."""
+        if self._fuzzy is None:
+            from symspell import SymSpellIndex
+            self._fuzzy = SymSpellIndex([name for name, _ in self._names], max_distance=2)
+        return self._fuzzy
+
+    @classmethod
+    def load(cls, path: str) -> "Gazetteer":
+        cities: list[City] = []
+        names: list[tuple[str, City]] = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip() or line.startswith("#"):
+                    continue
+                name, country, lat, lon, population, aliases = (line.rstrip("\n").split("\t") + [""] * 6)[:6]
+                city = City(name, country, float(lat), float(lon), int(population or 0))
+                cities.append(city)
+                names.append((name, city))
+                names.extend((alias, city) for alias in aliases.split(";") if alias.strip())
+        return cls(cities, names)
+
+    def lookup(self, name: str) -> City | None:
+        """The city a complete name or alias refers to."""
+        node = self._trie
+        for token in tokenize(name):
+            node = node.get(token)
+            if node is None:
+                return None
+        return node.get(_END)
+
+    def scan(self, tokens: list[str]) -> list[tuple[int, int, City]]:
+        """(start, end, city) for the longest name at each position, left to right, non-overlapping."""
+        found = []
+        i = 0
+        while i < len(tokens):
+            node = self._trie
+            best = None
+            j = i
+            while j < len(tokens):
+                node = node.get(tokens[j])
+                if node is None:
+                    break
+                j += 1
+                if _END in node:
+                    best = (i, j, node[_END])
+            if best:
+                found.append(best)
+                i = best[1]
+            else:
+                i += 1
+        return found
+
+    def find(self, text: str) -> City | None:
+        """
+        The city a question is about: a name right after "in"/"for"/"to"/...
+        beats one elsewhere ("nice weather in pune"), then longer names, then
+        bigger cities.
+        """
+        tokens = tokenize(text)
+        matches = self.scan(tokens)
+        if not matches:
+            return None
+        start, end, city = max(
+            matches,
+            key=lambda m: (m[0] > 0 and tokens[m[0] - 1] in PLACE_PREPOSITIONS, m[1] - m[0], m[2].population),
+        )
+        return city
+
+    def correct(self, name: str) -> City | None:
+        """The city a misspelled name most likely means ("hydrabad" -> Hyderabad), within max_typos."""
+        return self._correct_key(" ".join(tokenize(name)))
+
+    def _correct_key(self, key: str) -> City | None:
+        limit = max_typos(len(key))
+        if not limit:
+            return None
+        ids, _ = self.fuzzy.lookup(key, limit)
+        if not ids:
+            return None
+        return max((self._names[i][1] for i in ids), key=lambda c: c.population)
+
+    def find_fuzzy(self, text: str) -> City | None:
+        """
+        Like find(), for questions with a misspelled city. Only the one to three
+        words right after "in"/"for"/... or right before "weather" are tried,
+        longest first, and only when they end the question or stop at a
+        PLACE_ENDS word, so ordinary words elsewhere are never "corrected".
+        """
+        tokens = tokenize(text)
+        spans = []
+        cues = 0
+        for i, token in enumerate(tokens):
+            if cues == FUZZY_MAX_CUES:
+                break
+            if token in PLACE_PREPOSITIONS:
+                spans += [(i + 1, i + 1 + n) for n in (3, 2, 1) if i + 1 + n <= len(tokens)]
+                cues += 1
+            elif token in PLACE_FOLLOWERS:
+                spans += [(i - n, i) for n in (3, 2, 1) if i - n >= 0]
+                cues += 1
+        for start, end in spans:
+            if end < len(tokens) and tokens[end] not in PLACE_ENDS:
+                continue
+            city = self._correct_key(" ".join(tokens[start:end]))
+            if city is not None:
+                return city
+        return None
+
+_gazetteer: Gazetteer | None = None
+_gazetteer_lock = threading.Lock()
+
+def get_gazetteer() -> Gazetteer:
+    """The bundled gazetteer, loaded from GAZETTEER_PATH on first use."""
+    global _gazetteer
+    if _gazetteer is None:
+        with _gazetteer_lock:
+            if _gazetteer is None:
+                _gazetteer = Gazetteer.load(GAZETTEER_PATH)
+    return _gazetteer
@@ -0,0 +1,274 @@
+import asyncio
+import os
+import queue
+import threading
+import time
+from collections import Counter, deque
+from contextlib import asynccontextmanager, contextmanager
+from itertools import chain
+from typing import AsyncIterator, Callable, Iterator
+from backends import Backend, BackendPool
+
+# LLM_HEDGE=1 sends a direct answer's generation to a second host when its first token is late
+HEDGE_ENABLED = os.getenv("LLM_HEDGE", "0") == "1"
+# Hedge once the first token is later than this percentile of recent first-token times
+HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+# Hedges allowed per generation (0.05 = at most 5% extra load on the hosts)
+HEDGE_BUDGET = float(os.getenv("LLM_HEDGE_BUDGET", "0.05"))
+# First-token times needed before the percentile is trusted; no hedging until then
+HEDGE_MIN_SAMPLES = 20
+# Recent first-token times kept for the percentile
+_WINDOW = 500
+
+class HedgePolicy:
+    """
+    When to hedge: after the HEDGE_PERCENTILE of recent first-token times, and
+    only while hedges stay within `budget` x generations, so a slow host costs
+    a few duplicate requests rather than doubling the load.
+    """
+
+    def __init__(self, percentile: float = HEDGE_PERCENTILE, budget: float = HEDGE_BUDGET,
+                 min_samples: int = HEDGE_MIN_SAMPLES):
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self._samples: deque[float] = deque(maxlen=_WINDOW)
+        self._lock = threading.Lock()
+        self._stats: Counter = Counter()
+
+    def _delay(self) -> float | None:
+        # Caller holds self._lock
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))]
+
+    def start(self) -> float | None:
+        """Count one generation; returns seconds to wait for its first token before hedging (None = never)."""
+        with self._lock:
+            self._stats["requests"] += 1
+            return self._delay()
+
+    def allow(self) -> bool:
+        """Spend one hedge if the budget has room for it."""
+        with self._lock:
+            if self._stats["fired"] + 1 > self.budget * self._stats["requests"]:
+                self._stats["over_budget"] += 1
+                return False
+            self._stats["fired"] += 1
+            return True
+
+    def no_spare(self):
+        """A hedge was due but no other healthy host was there to take it."""
+        with self._lock:
+            self._stats["no_spare"] += 1
+
+    def observe(self, first_token: float, hedge_won: bool):
+        """Record the first-token time the caller saw, and whether the hedge produced it."""
+        with self._lock:
+            self._samples.append(first_token)
+            self._stats["won"] += int(hedge_won)
+
+    def stats(self) -> dict:
+        """requests, fired, won, over_budget, no_spare, fire_rate, win_rate and the current delay (seconds)."""
+        with self._lock:
+            requests, fired, won = self._stats["requests"], self._stats["fired"], self._stats["won"]
+            return {
+                "requests": requests, "fired": fired, "won": won,
+                "over_budget": self._stats["over_budget"], "no_spare": self._stats["no_spare"],
+                "fire_rate": fired / requests if requests else 0.0,
+                "win_rate": won / fired if fired else 0.0,
+                "delay": self._delay(),
+            }
+
+def _spare(pool: BackendPool, primary: Backend, policy: HedgePolicy) -> Backend | None:
+    """Acquire a second host for a hedge, if there is one and the budget allows it."""
+    backend = pool.acquire(exclude=primary)
+    if backend is None:
+        policy.no_spare()
+        return None
+    if not policy.allow():
+        pool.release(backend)
+        return None
+    return backend
+
+# --- Sync ---
+class _Attempt:
+    """One host's copy of the generation; its first chunk is fetched on a worker thread."""
+
+    __slots__ = ("pool", "backend", "stream", "lock", "done", "abandoned", "error")
+
+    def __init__(self, pool: BackendPool, backend: Backend, stream: Iterator[str], results: queue.Queue):
+        self.pool = pool
+        self.backend = backend
+        self.stream = stream
+        self.lock = threading.Lock()
+        self.done = False
+        self.abandoned = False
+        self.error: BaseException | None = None
+        threading.Thread(target=self._first, args=(results,), name="llm-hedge", daemon=True).start()
+
+    def _first(self, results: queue.Queue):
+        first = None
+        try:
+            first = next(self.stream)
+        except StopIteration:
+            pass
+        except Exception as e:
+            self.error = e
+        with self.lock:
+            self.done = True
+            abandoned = self.abandoned
+        if abandoned:
+            self.close()
+        else:
+            results.put((self, first))
+
+    def abandon(self):
+        """Drop this copy: closed now if its first chunk is in, else as soon as it arrives."""
+        with self.lock:
+            self.abandoned = True
+            done = self.done
+        if done:
+            self.close()
+
+    def close(self, served: bool = False, error: BaseException | None = None):
+        try:
+            self.stream.close()  # drops the HTTP stream, which stops generation on the Ollama side
+        finally:
+            self.pool.release(self.backend, served, error or self.error)
+
+@contextmanager
+def hedged_stream(pool: BackendPool, open_stream: Callable[[Backend], Iterator[str]], policy: HedgePolicy,
+                  report: dict | None = None) -> Iterator[Iterator[str]]:
+    """
+    Chunks of one generation, sent to the least loaded host. If it has no first
+    chunk within the policy's delay, the same request goes to a second host and
+    whichever answers first is streamed. The other is closed, once its first
+    chunk arrives if it is still waiting for one (a blocked read cannot be
+    interrupted). Leases end with the block. `report` gets "hedged" and "hedge_won".
+    """
+    delay = policy.start()
+    start = time.perf_counter()
+    results: queue.Queue = queue.Queue()
+    backend = pool.acquire()
+    primary = _Attempt(pool, backend, open_stream(backend), results)
+    pending = [primary]
+    hedged = False
+    try:
+        try:
+            item = results.get(timeout=delay)
+        except queue.Empty:
+            spare = _spare(pool, primary.backend, policy)
+            if spare is not None:
+                hedged = True
+                pending.append(_Attempt(pool, spare, open_stream(spare), results))
+            item = results.get()
+        while True:
+            attempt, first = item
+            pending.remove(attempt)
+            if attempt.error is None:
+                winner = attempt
+                break
+            attempt.close()
+            if not pending:
+                raise attempt.error
+            item = results.get()  # that copy failed; the other may still answer
+    finally:
+        for attempt in pending:
+            attempt.abandon()
+    hedge_won = winner is not primary
+    policy.observe(time.perf_counter() - start, hedge_won)
+    if report is not None:
+        report.update(hedged=hedged, hedge_won=hedge_won)
+    served = False
+    error = None
+    try:
+        yield chain(() if first is None else (first,), winner.stream)
+        served = True
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        winner.close(served, error)
+
+# --- Async ---
+class _AsyncAttempt:
+    """One host's copy of the generation; its first chunk is awaited in a task."""
+
+    __slots__ = ("pool", "backend", "stream", "task")
+
+    def __init__(self, pool: BackendPool, backend: Backend, stream: AsyncIterator[str]):
+        self.pool = pool
+        self.backend = backend
+        self.stream = stream
+        self.task = asyncio.ensure_future(self._first())
+
+    async def _first(self) -> str | None:
+        try:
+            return await self.stream.__anext__()
+        except StopAsyncIteration:
+            return None
+
+    async def close(self, served: bool = False, error: BaseException | None = None):
+        self.task.cancel()  # a no-op once the first chunk is in
+        try:
+            await asyncio.gather(self.task, return_exceptions=True)
+            await self.stream.aclose()
+        finally:
+            self.pool.release(self.backend, served, error)
+
+async def _chain(first: str | None, stream: AsyncIterator[str]) -> AsyncIterator[str]:
+    if first is not None:
+        yield first
+    async for chunk in stream:
+        yield chunk
+
+@asynccontextmanager
+async def hedged_astream(pool: BackendPool, open_astream: Callable[[Backend], AsyncIterator[str]],
+                         policy: HedgePolicy, report: dict | None = None) -> AsyncIterator[AsyncIterator[str]]:
+    """Async twin of hedged_stream(): the losing copy's task is cancelled outright."""
+    delay = policy.start()
+    start = time.perf_counter()
+    backend = pool.acquire()
+    primary = _AsyncAttempt(pool, backend, open_astream(backend))
+    pending = {primary.task: primary}
+    hedged = False
+    winner = first = error = None
+    try:
+        if delay is not None:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if not done:
+                spare = _spare(pool, primary.backend, policy)
+                if spare is not None:
+                    hedged = True
+                    attempt = _AsyncAttempt(pool, spare, open_astream(spare))
+                    pending[attempt.task] = attempt
+        while winner is None:
+            if not pending:
+                raise error
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                attempt = pending.pop(task)
+                if winner is None and task.exception() is None:
+                    winner, first = attempt, task.result()
+                else:
+                    error = error or task.exception()
+                    await attempt.close(error=task.exception())
+    finally:
+        for attempt in pending.values():
+            await attempt.close()
+    hedge_won = winner is not primary
+    policy.observe(time.perf_counter() - start, hedge_won)
+    if report is not None:
+        report.update(hedged=hedged, hedge_won=hedge_won)
+    served = False
+    error = None
+    try:
+        yield _chain(first, winner.stream)
+        served = True
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        await winner.close(served, error)
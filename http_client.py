@@ -0,0 +1,90 @@
+import asyncio
+import os
+import threading
+import weakref
+from typing import TYPE_CHECKING
+import config  # noqa: F401
+
+# requests/httpx are imported by the accessors, not at module import
+if TYPE_CHECKING:
+    import httpx
+    import requests
+
+DEFAULT_TIMEOUT = 12  # seconds
+UA = {"User-Agent": "FactualReActAgent/1.2 (+https://example.local)"}
+
+# Connections kept open per upstream host (api.openweathermap.org, serpapi.com, en.wikipedia.org, ...)
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "10"))
+KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_SECONDS", "60"))
+
+_session: "requests.Session | None" = None
+_session_lock = threading.Lock()
+
+def _accept_encoding() -> str:
+    # gzip/deflate, plus br/zstd when brotli/zstandard are installed and urllib3 can decode them
+    from urllib3.util import make_headers
+    return make_headers(accept_encoding=True)["accept-encoding"]
+
+def get_session() -> "requests.Session":
+    """
+    Process-wide pooled requests.Session with keep-alive and compressed responses.
+    Built on first use; safe to call from any thread.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update(UA)
+                session.headers["Accept-Encoding"] = _accept_encoding()
+                _session = session
+    return _session
+
+# httpx clients are bound to the event loop that created them, so keep one per loop.
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+def get_async_client() -> "httpx.AsyncClient":
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        import httpx
+        limits = httpx.Limits(
+            max_connections=None,
+            max_keepalive_connections=POOL_SIZE,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        )
+        client = httpx.AsyncClient(
+            headers={**UA, "Accept-Encoding": _accept_encoding()},
+            timeout=DEFAULT_TIMEOUT,
+            limits=limits,
+            follow_redirects=True,
+        )
+        _async_clients[loop] = client
+    return client
+
+def prewarm(urls: list[str], connections: int = 1) -> threading.Thread:
+    """
+    Open pooled connections to each upstream in the background so the first
+    user request skips the TCP+TLS handshake. Failures are ignored.
+    """
+    def warm_one(url: str):
+        try:
+            get_session().head(url, timeout=DEFAULT_TIMEOUT, allow_redirects=False)
+        except Exception:
+            pass
+
+    def run():
+        workers = [threading.Thread(target=warm_one, args=(u,), daemon=True) for u in urls for _ in range(connections)]
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+
+    thread = threading.Thread(target=run, name="http-prewarm", daemon=True)
+    thread.start()
+    return thread
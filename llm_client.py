@@ -0,0 +1,176 @@
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from functools import partial
+from typing import AsyncIterator, Iterator
+import config  # noqa: F401  (loads .env before MODEL_NAME is read)
+from backends import BackendPool
+from hedging import HEDGE_ENABLED, HedgePolicy, hedged_astream, hedged_stream
+
+MODEL_NAME = os.getenv("MODEL_NAME", "mistral-openorca")
+# Smaller model that answers direct questions first, escalating to MODEL_NAME (unset = no cascade)
+SMALL_MODEL_NAME = os.getenv("SMALL_MODEL_NAME", "").strip()
+# How long Ollama keeps MODEL_NAME loaded after a request ("30m", "1h", seconds, or -1 = forever)
+KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+# Load the model in the background at startup (OLLAMA_WARMUP=0 disables)
+WARMUP_ON_START = os.getenv("OLLAMA_WARMUP", "1") == "1"
+# Seconds between `ollama ps` checks that re-warm an evicted model (0 = check once)
+RESIDENCY_CHECK_SECONDS = float(os.getenv("OLLAMA_RESIDENCY_CHECK_SECONDS", "60"))
+# Ollama hosts to spread generations over, comma-separated ("http://gpu1:11434,http://gpu2:11434").
+# Unset = the single host from OLLAMA_HOST, as the ollama client defaults to.
+OLLAMA_HOSTS = [h.strip() for h in os.getenv("OLLAMA_HOSTS", "").split(",") if h.strip()]
+# Seconds between health probes of the hosts when there is more than one (0 = only passive ejection)
+HEALTH_CHECK_SECONDS = float(os.getenv("OLLAMA_HEALTH_CHECK_SECONDS", "10"))
+
+def _keep_alive() -> int | str:
+    value = KEEP_ALIVE.strip()
+    return int(value) if value.lstrip("-").isdigit() else value
+
+_pools: dict[str, BackendPool] = {}
+_pool_lock = threading.Lock()
+
+def _make_llm(url: str, model: str = MODEL_NAME):
+    from langchain_ollama import OllamaLLM
+    return OllamaLLM(model=model, base_url=url, keep_alive=_keep_alive())
+
+def get_pool(model: str = MODEL_NAME) -> BackendPool:
+    """
+    Process-wide pool of OllamaLLM clients for `model`, one per host, built
+    on first use. langchain_ollama is imported here, so code paths that never
+    reach the LLM never pay for it.
+    """
+    pool = _pools.get(model)
+    if pool is None:
+        with _pool_lock:
+            pool = _pools.get(model)
+            if pool is None:
+                hosts = OLLAMA_HOSTS or [os.getenv("OLLAMA_HOST") or "http://localhost:11434"]
+                pool = BackendPool(hosts, partial(_make_llm, model=model), model)
+                if len(pool.backends) > 1:
+                    pool.start_health_checks(HEALTH_CHECK_SECONDS)
+                _pools[model] = pool
+    return pool
+
+def get_llm():
+    """The OllamaLLM a generation would be sent to right now (see llm_lease)."""
+    return get_pool().choose().client
+
+@contextmanager
+def llm_lease() -> Iterator:
+    """OllamaLLM on the least loaded healthy host, counted as busy there for the block."""
+    with get_pool().lease() as backend:
+        yield backend.client
+
+def backend_stats() -> list[dict]:
+    """Per host: url, healthy, resident, outstanding, served, error, checked_at."""
+    return get_pool().stats()
+
+# --- Streaming generations ---
+HEDGE_POLICY = HedgePolicy()
+
+@contextmanager
+def llm_stream(prompt: str, options: dict, hedge: bool = False, report: dict | None = None,
+               model: str = MODEL_NAME) -> Iterator[Iterator[str]]:
+    """
+    Chunks of one generation on a leased host. The HTTP stream is closed when the
+    block exits, which stops generation on the Ollama side. hedge=True lets
+    LLM_HEDGE race a second host when the first chunk is late (see hedging.py);
+    the first-chunk times it goes by are MODEL_NAME's, so other models are not hedged.
+    """
+    pool = get_pool(model)
+    if hedge and HEDGE_ENABLED and model == MODEL_NAME:
+        with hedged_stream(pool, lambda b: b.client.stream(prompt, options=options), HEDGE_POLICY, report) as stream:
+            yield stream
+        return
+    with pool.lease() as backend:
+        stream = backend.client.stream(prompt, options=options)
+        try:
+            yield stream
+        finally:
+            stream.close()
+
+@asynccontextmanager
+async def llm_astream(prompt: str, options: dict, hedge: bool = False, report: dict | None = None,
+                      model: str = MODEL_NAME) -> AsyncIterator[AsyncIterator[str]]:
+    """Async twin of llm_stream()."""
+    pool = get_pool(model)
+    if hedge and HEDGE_ENABLED and model == MODEL_NAME:
+        async with hedged_astream(pool, lambda b: b.client.astream(prompt, options=options), HEDGE_POLICY,
+                                  report) as stream:
+            yield stream
+        return
+    with pool.lease() as backend:
+        stream = backend.client.astream(prompt, options=options)
+        try:
+            yield stream
+        finally:
+            await stream.aclose()
+
+def hedge_stats() -> dict:
+    """Hedged direct generations: requests, fired, won, over_budget, no_spare, rates and the current delay."""
+    return HEDGE_POLICY.stats()
+
+# --- Warm-up and residency ---
+_status = {"state": "cold", "error": None, "warmed_at": None, "checked_at": None, "warmups": 0}
+_status_lock = threading.Lock()
+_warmup_thread: threading.Thread | None = None
+
+def llm_status() -> dict:
+    """
+    Readiness of MODEL_NAME: state is "cold", "warming", "ready" or "error",
+    plus the last error, the last warm-up/residency-check times and warm-up count.
+    """
+    with _status_lock:
+        return dict(_status)
+
+def _set_status(**fields):
+    with _status_lock:
+        _status.update(fields)
+
+def _load(model: str):
+    # llm.invoke would go through langchain callbacks; the raw client is enough here
+    with get_pool(model).lease() as backend:
+        backend.client._client.generate(model=model, prompt="Hi", options={"num_predict": 1}, keep_alive=_keep_alive())
+
+def warm_model() -> bool:
+    """Load MODEL_NAME on the preferred host with a one-token generation; returns True once it answered."""
+    _set_status(state="warming")
+    try:
+        _load(MODEL_NAME)
+    except Exception as e:
+        _set_status(state="error", error=repr(e))
+        return False
+    with _status_lock:
+        _status.update(state="ready", error=None, warmed_at=time.time())
+        _status["warmups"] += 1
+    return True
+
+def _residency_loop():
+    warm_model()
+    if SMALL_MODEL_NAME:
+        try:
+            _load(SMALL_MODEL_NAME)
+        except Exception:
+            pass  # the cascade falls back to MODEL_NAME when the small model fails
+    while RESIDENCY_CHECK_SECONDS > 0:
+        time.sleep(RESIDENCY_CHECK_SECONDS)
+        pool = get_pool()
+        if pool.probe_all():
+            _set_status(checked_at=time.time())
+            resident = any(b["healthy"] and b["resident"] for b in pool.stats())
+        else:
+            errors = "; ".join(f"{b['url']}: {b['error']}" for b in pool.stats())
+            _set_status(state="error", error=errors, checked_at=time.time())
+            resident = False
+        if not resident:
+            warm_model()
+
+def start_warmup() -> threading.Thread:
+    """Start (once per process) the background warm-up and residency checker."""
+    global _warmup_thread
+    with _status_lock:
+        if _warmup_thread is None:
+            _warmup_thread = threading.Thread(target=_residency_loop, name="ollama-warmup", daemon=True)
+            _warmup_thread.start()
+    return _warmup_thread
@@ -0,0 +1,195 @@
+import os
+import re
+from functools import lru_cache
+
+# Routing reads at most this many characters of a question, so a pasted essay costs
+# the same as a short question; the LLM still gets the whole text.
+MAX_QUESTION_CHARS = int(os.getenv("MAX_QUESTION_CHARS", "500"))
+
+# Keyword groups read by the routing predicates in agent_loop.
+# Terms match whole words of the lower-cased question ("mp" does not fire on
+# "compute", "who" not on "whole"); multi-word terms match across any whitespace.
+# Inflections are listed explicitly rather than matched as prefixes.
+QUESTION_GROUPS = {
+    # detect_category
+    "weather_category": [
+        "weather", "temperature", "temperatures", "humidity", "rain", "rains", "raining", "rainy", "rainfall",
+        "forecast", "forecasts", "climate", "wind", "winds", "windy", "sunny", "cloudy", "storm", "storms",
+        "stormy", "thunderstorm", "thunderstorms", "snow", "snowing", "snowy", "snowfall"
+    ],
+    "sports": [
+        "ipl", "cricket", "football", "soccer", "tennis", "nba", "nfl", "fifa", "world cup", "sports", "sport",
+        "score", "scores", "match", "player", "players", "tournament", "tournaments"
+    ],
+    "politics": [
+        "prime minister", "president", "government", "election", "elections", "vote", "votes", "voting",
+        "parliament", "politics", "minister", "ministers", "mla", "mlas", "mp", "mps", "political", "party"
+    ],
+    "general_knowledge": [
+        "history", "science", "math", "who", "what", "when", "where", "why", "how", "population", "country", "general knowledge"
+    ],
+    # is_weather_related
+    "weather": [
+        "weather", "temperature", "temperatures", "humidity", "rain", "rains", "raining", "rainy", "rainfall",
+        "wind", "winds", "windy", "forecast", "forecasts", "sunny", "cloudy", "storm", "storms", "stormy",
+        "thunderstorm", "thunderstorms", "snow", "snowing", "snowy", "snowfall", "precipitation", "climate"
+    ],
+    "forecast": ["forecast", "forecasts"],
+    # is_time_sensitive (a 19xx/20xx year or "did <team> win" also counts, see QUESTION_PATTERNS).
+    # Left out as bare words, being mostly about something else in questions: "matches"
+    # ("a regex that matches"), "win"/"winning" ("win at chess") and "results" ("results of a promise").
+    "time_sensitive": [
+        "who won", "who will win", "who wins", "won the", "wins the", "won by", "winner", "winners",
+        "final", "finals", "finalist", "finalists", "score", "scores", "scored", "scorer", "scorers",
+        "beat", "beats", "beaten", "defeat", "defeats", "defeated", "trophy", "trophies", "title", "titles",
+        "champion", "champions", "championship", "championships", "match", "match result", "match results",
+        "fixture", "fixtures", "mvp",
+        "ipl", "fifa", "world cup", "uefa", "olympics", "nba", "nfl", "mlb", "nhl", "grand slam",
+        "nobel", "oscars", "academy awards", "emmys", "grammys", "ballon d'or", "golden globes",
+        "president", "presidents", "presidential", "presidency", "prime minister", "prime ministers",
+        "chief minister", "chief ministers", "current", "currently", "mla", "mlas", "mp", "mps",
+        "member of parliament", "election", "elections", "electoral", "vote", "votes", "voted", "voting",
+        "voter", "voters", "poll", "polls", "polling", "candidate", "candidates"
+    ],
+    # Direct questions the model cascade sends straight to MODEL_NAME (see cascade.is_hard)
+    "hard": [
+        "code", "coding", "script", "function", "program", "programming", "implement", "python", "javascript",
+        "typescript", "sql", "regex", "algorithm", "debug", "compile", "bash",
+        "explain", "compare", "difference between", "step by step", "prove", "derive", "calculate", "solve"
+    ],
+    # get_weather_intent: "<word>" plus a time word, or one of the "<word>_intent" phrases
+    "intent_time": ["today", "tomorrow", "tonight", "now"],
+    "rain_word": ["rain", "raining", "rainy"],
+    "rain_intent": [
+        "gonna rain", "going to rain", "will it rain", "chance of rain", "rain expected", "raining today", "precipitation"
+    ],
+    "sunny_word": ["sunny"],
+    "sunny_intent": ["gonna be sunny", "going to be sunny", "will it be sunny", "sunny expected", "clear skies"],
+    "cloudy_word": ["cloudy"],
+    "cloudy_intent": ["gonna be cloudy", "going to be cloudy", "will it be cloudy", "cloudy expected", "overcast", "clouds"],
+    "windy_word": ["windy"],
+    "windy_intent": [
+        "gonna be windy", "going to be windy", "will it be windy", "windy expected", "strong winds", "gusty", "wind speed"
+    ],
+    "snow_word": ["snow", "snowing", "snowy"],
+    "snow_intent": ["gonna snow", "going to snow", "will it snow", "chance of snow", "snow expected"],
+}
+
+# Words in a forecast text that confirm each weather intent (answer_weather_forecast).
+# OpenWeather descriptions are matched as substrings ("thunder" in "thunderstorm").
+FORECAST_GROUPS = {
+    "rain": ["rain", "showers", "drizzle", "thunder"],
+    "sunny": ["sunny", "clear"],
+    "cloudy": ["cloudy", "overcast", "clouds"],
+    "windy": ["windy", "strong winds", "gusty"],
+    "snow": ["snow", "blizzard"],
+}
+
+# Regex-defined groups scanned in the same pass as the keywords
+QUESTION_PATTERNS = {
+    "year": r"\b(?:19|20)\d{2}\b",
+    # "did Spain win", "has Real Madrid won"; not "do I win" or "will you win"
+    "team_won": r"\b(?:did|does|will|has|have)\s+(?!(?:i|you|we|it|one)\b)[a-z.']+(?:\s+[a-z.']+)?\s+w[io]n\b",
+}
+
+def _trie_pattern(terms: list[str], whole_words: bool) -> str:
+    """
+    Regex alternation for `terms` factored on common prefixes, with longer
+    continuations tried first so the match at each position is the longest term.
+    With whole_words, a term must start and end on a word boundary and the
+    spaces inside a phrase match any run of whitespace.
+    """
+    trie: dict = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+    end = r"\b" if whole_words else ""
+
+    def emit(node: dict) -> str:
+        branches = [
+            (r"\s+" if ch == " " and whole_words else re.escape(ch)) + emit(child)
+            for ch, child in sorted(node.items()) if ch
+        ]
+        if "" in node:
+            # Ending here is the last resort, after every longer continuation
+            branches.append(end)
+        return branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+
+    return (r"\b" if whole_words else "") + emit(trie)
+
+class KeywordMatcher:
+    """
+    All keyword groups compiled into one regex and scanned in a single pass.
+    A zero-width lookahead tries every start position, so overlapping terms are
+    all found: as whole words/phrases with whole_words, otherwise exactly as
+    `term in text` would find them.
+    """
+
+    def __init__(self, groups: dict[str, list[str]], patterns: dict[str, str] | None = None,
+                 whole_words: bool = False):
+        terms = sorted({t for words in groups.values() for t in words})
+        self._groups_of: dict[str, frozenset] = {}
+        for term in terms:
+            # The longest term at a position stands in for every term that is a prefix of it
+            if whole_words:
+                names = {g for g, words in groups.items() for w in words if term == w or term.startswith(w + " ")}
+            else:
+                names = {g for g, words in groups.items() for w in words if term.startswith(w)}
+            self._groups_of[term] = frozenset(names)
+        self._whole_words = whole_words
+        alternatives = [_trie_pattern(terms, whole_words)]
+        self._patterns = list(patterns or {})
+        alternatives += [f"(?P<{name}>{regex})" for name, regex in (patterns or {}).items()]
+        self._regex = re.compile(f"(?=({'|'.join(alternatives)}))")
+
+    def scan(self, text: str) -> tuple[frozenset, frozenset]:
+        """Returns (matched groups, matched terms) for already lower-cased text."""
+        groups: set = set()
+        terms: set = set()
+        for m in self._regex.finditer(text):
+            term = m.group(1)
+            if self._whole_words:
+                term = " ".join(term.split())
+            names = self._groups_of.get(term)
+            if names is None:
+                groups.update(name for name in self._patterns if m.group(name) is not None)
+                continue
+            terms.add(term)
+            groups |= names
+        return frozenset(groups), frozenset(terms)
+
+class QueryFeatures:
+    """What the router knows about a question after one scan."""
+
+    __slots__ = ("text", "groups", "terms")
+
+    def __init__(self, text: str, groups: frozenset, terms: frozenset):
+        self.text = text
+        self.groups = groups
+        self.terms = terms
+
+    def has(self, group: str) -> bool:
+        return group in self.groups
+
+QUESTION_MATCHER = KeywordMatcher(QUESTION_GROUPS, QUESTION_PATTERNS, whole_words=True)
+FORECAST_MATCHER = KeywordMatcher(FORECAST_GROUPS)
+
+def clip_question(question: str) -> str:
+    """The part of a question routing looks at (the first MAX_QUESTION_CHARS characters)."""
+    return question[:MAX_QUESTION_CHARS]
+
+@lru_cache(maxsize=1024)
+def scan_question(question: str) -> QueryFeatures:
+    """
+    Lower-case and scan a question once; every routing predicate for the same
+    question reads the cached result.
+    """
+    text = clip_question(question).lower()
+    groups, terms = QUESTION_MATCHER.scan(text)
+    return QueryFeatures(text, groups, terms)
+
+def forecast_mentions(forecast: str) -> frozenset:
+    """FORECAST_GROUPS names whose words occur in a forecast text."""
+    return FORECAST_MATCHER.scan(forecast.lower())[0]
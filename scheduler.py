@@ -0,0 +1,197 @@
+import asyncio
+import os
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Callable
+
+# Generations allowed to run against Ollama at once; the rest queue here
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "2"))
+# Seconds an interactive request may wait for a slot before it is turned away as busy
+LLM_QUEUE_DEADLINE = float(os.getenv("LLM_QUEUE_DEADLINE", "15"))
+
+# Highest priority first: one-sentence answers, then composed search answers, then batch jobs
+LANES = ("direct", "compose", "batch")
+# Smoothing of the slot hold time used to predict queue waits
+_SERVICE_ALPHA = 0.2
+
+class LLMBusy(Exception):
+    """The LLM queue is too long to answer within the lane's deadline; try again later."""
+
+class _Waiter:
+    __slots__ = ("lane", "session", "wake", "granted")
+
+    def __init__(self, lane: str, session: str, wake: Callable[[], None]):
+        self.lane = lane
+        self.session = session
+        self.wake = wake
+        self.granted = False
+
+class LLMScheduler:
+    """
+    Admission control for LLM generations. At most `max_concurrency` hold a
+    slot; the others queue in priority lanes, and within a lane sessions take
+    turns, so one session's burst cannot starve another's question. A request
+    whose predicted wait (queue ahead of it x smoothed slot time) is over its
+    lane's deadline is rejected at once with LLMBusy, as is one still
+    waiting when the deadline passes. Lanes with no deadline (batch) always wait.
+    """
+
+    def __init__(self, max_concurrency: int = LLM_MAX_CONCURRENCY, deadlines: dict[str, float | None] | None = None):
+        self.max_concurrency = max(1, max_concurrency)
+        self.deadlines = deadlines if deadlines is not None else {
+            "direct": LLM_QUEUE_DEADLINE, "compose": LLM_QUEUE_DEADLINE, "batch": None,
+        }
+        self._queues: dict[str, OrderedDict[str, deque]] = {lane: OrderedDict() for lane in LANES}
+        self._running = 0
+        self._service: float | None = None
+        self._lock = threading.Lock()
+        self._stats: Counter = Counter()
+
+    # --- Queue (all called with self._lock held) ---
+    def _queued(self, lanes=LANES) -> int:
+        return sum(len(waiters) for lane in lanes for waiters in self._queues[lane].values())
+
+    def _predicted_wait(self, lane: str) -> float:
+        if self._service is None:
+            return 0.0
+        ahead = self._queued(LANES[:LANES.index(lane) + 1])
+        return (ahead + 1) * self._service / self.max_concurrency
+
+    def _next(self) -> _Waiter | None:
+        for lane in LANES:
+            sessions = self._queues[lane]
+            if sessions:
+                session, waiters = next(iter(sessions.items()))
+                waiter = waiters.popleft()
+                if waiters:
+                    sessions.move_to_end(session)  # next turn goes to another session
+                else:
+                    del sessions[session]
+                return waiter
+        return None
+
+    def _dispatch(self):
+        while self._running < self.max_concurrency:
+            waiter = self._next()
+            if waiter is None:
+                return
+            waiter.granted = True
+            self._running += 1
+            waiter.wake()
+
+    def _remove(self, waiter: _Waiter):
+        sessions = self._queues[waiter.lane]
+        waiters = sessions.get(waiter.session)
+        if waiters is not None and waiter in waiters:
+            waiters.remove(waiter)
+            if not waiters:
+                del sessions[waiter.session]
+
+    def _reject(self, lane: str, reason: str):
+        self._stats[lane, "rejected"] += 1
+        raise LLMBusy(f"LLM queue too long for the {lane} lane ({reason})")
+
+    # --- Slots ---
+    def _enqueue(self, lane: str, session: str | None, wake: Callable[[], None]) -> _Waiter:
+        if lane not in self._queues:
+            raise ValueError(f"unknown lane {lane!r}")
+        waiter = _Waiter(lane, session or "", wake)
+        with self._lock:
+            if self._running < self.max_concurrency and not self._queued():
+                waiter.granted = True
+                self._running += 1
+                return waiter
+            deadline = self.deadlines.get(lane)
+            if deadline is not None and self._predicted_wait(lane) > deadline:
+                self._reject(lane, "predicted wait over deadline")
+            self._queues[lane].setdefault(waiter.session, deque()).append(waiter)
+        return waiter
+
+    def _admitted(self, lane: str, waited: float, report: dict | None):
+        with self._lock:
+            self._stats[lane, "admitted"] += 1
+            self._stats[lane, "queue_time"] += waited
+            self._stats[lane, "queue_time_max"] = max(self._stats[lane, "queue_time_max"], waited)
+        if report is not None:
+            report["queue_time"] = waited
+
+    def _release(self, held: float | None):
+        with self._lock:
+            self._running -= 1
+            if held is not None:
+                self._service = held if self._service is None else (
+                    (1 - _SERVICE_ALPHA) * self._service + _SERVICE_ALPHA * held
+                )
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, lane: str, session: str | None = None, report: dict | None = None):
+        """
+        Hold one generation slot for the block. Blocks while queued; raises
+        LLMBusy instead of waiting past the lane's deadline. `report` gets
+        "queue_time" (seconds spent waiting).
+        """
+        start = time.perf_counter()
+        event = threading.Event()
+        waiter = self._enqueue(lane, session, event.set)
+        if not waiter.granted:
+            event.wait(self.deadlines.get(lane))
+            with self._lock:
+                if not waiter.granted:
+                    self._remove(waiter)
+                    self._reject(lane, "deadline passed while queued")
+        held_from = time.perf_counter()
+        self._admitted(lane, held_from - start, report)
+        try:
+            yield
+        finally:
+            self._release(time.perf_counter() - held_from)
+
+    @asynccontextmanager
+    async def slot_async(self, lane: str, session: str | None = None, report: dict | None = None):
+        """Async twin of slot(): waits without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def wake():
+            # Called from whichever thread released the slot
+            loop.call_soon_threadsafe(lambda: granted.done() or granted.set_result(None))
+
+        start = time.perf_counter()
+        waiter = self._enqueue(lane, session, wake)
+        if not waiter.granted:
+            try:
+                await asyncio.wait_for(asyncio.shield(granted), self.deadlines.get(lane))
+            except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+                with self._lock:
+                    got_slot = waiter.granted
+                    if not got_slot:
+                        self._remove(waiter)
+                        if isinstance(e, asyncio.TimeoutError):
+                            self._reject(lane, "deadline passed while queued")
+                if isinstance(e, asyncio.CancelledError):
+                    if got_slot:
+                        self._release(None)
+                    raise
+        held_from = time.perf_counter()
+        self._admitted(lane, held_from - start, report)
+        try:
+            yield
+        finally:
+            self._release(time.perf_counter() - held_from)
+
+    def stats(self) -> dict:
+        """Per lane admitted / rejected / queue_time_avg / queue_time_max (seconds), plus running and queued now."""
+        with self._lock:
+            lanes = {}
+            for lane in LANES:
+                admitted = self._stats[lane, "admitted"]
+                lanes[lane] = {
+                    "admitted": admitted,
+                    "rejected": self._stats[lane, "rejected"],
+                    "queue_time_avg": self._stats[lane, "queue_time"] / admitted if admitted else 0.0,
+                    "queue_time_max": self._stats[lane, "queue_time_max"],
+                }
+            return {"lanes": lanes, "running": self._running, "queued": self._queued()}
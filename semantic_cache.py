@@ -0,0 +1,95 @@
+import hashlib
+import re
+import threading
+from collections import Counter
+import numpy as np
+
+class HashingEmbedder:
+    """
+    Deterministic, offline stand-in for OllamaEmbeddings: hashes words and
+    character trigrams into a fixed-size vector. Good enough to exercise the
+    cache without a model server; not a substitute for real embeddings.
+    """
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    def embed_query(self, text: str) -> list[float]:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        words = re.findall(r"[a-z0-9]+", text.lower())
+        grams = words + [w[i:i + 3] for w in words for i in range(max(len(w) - 2, 1))]
+        for g in grams:
+            h = int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest(), "little")
+            vec[h % self.dim] += 1.0 if (h >> 63) else -1.0
+        return vec.tolist()
+
+class SemanticCache:
+    """
+    Answer cache keyed on meaning rather than exact text.
+    Questions are embedded, L2-normalised and stored as rows of one contiguous
+    float32 matrix; lookup is a single matrix-vector product (cosine top-1)
+    accepted when the score reaches `threshold`. When full, the least recently
+    used row is overwritten in place.
+    """
+
+    def __init__(self, embedder, threshold: float = 0.92, max_entries: int = 2048):
+        self.embedder = embedder
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.counters: Counter = Counter()
+        self._matrix: np.ndarray | None = None  # allocated once the embedding size is known
+        self._answers: list[str | None] = [None] * max_entries
+        self._last_used = np.zeros(max_entries, dtype=np.int64)
+        self._size = 0
+        self._tick = 0
+        self._lock = threading.Lock()
+
+    def _embed(self, text: str) -> np.ndarray:
+        vec = np.asarray(self.embedder.embed_query(text), dtype=np.float32)
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm else vec
+
+    def lookup(self, question: str) -> tuple[str, float] | None:
+        """Returns (answer, cosine score) of the closest stored question, or None below threshold."""
+        vec = self._embed(question)
+        with self._lock:
+            if not self._size:
+                self.counters["misses"] += 1
+                return None
+            scores = self._matrix[:self._size] @ vec
+            best = int(np.argmax(scores))
+            score = float(scores[best])
+            if score < self.threshold:
+                self.counters["misses"] += 1
+                return None
+            self._tick += 1
+            self._last_used[best] = self._tick
+            self.counters["hits"] += 1
+            return self._answers[best], score
+
+    def add(self, question: str, answer: str):
+        vec = self._embed(question)
+        with self._lock:
+            if self._matrix is None:
+                self._matrix = np.zeros((self.max_entries, vec.shape[0]), dtype=np.float32)
+            if self._size < self.max_entries:
+                row = self._size
+                self._size += 1
+            else:
+                row = int(np.argmin(self._last_used))
+                self.counters["evictions"] += 1
+            self._matrix[row] = vec
+            self._answers[row] = answer
+            self._tick += 1
+            self._last_used[row] = self._tick
+            self.counters["adds"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._size = 0
+            self._answers = [None] * self.max_entries
+            self._last_used[:] = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": self._size, **self.counters}
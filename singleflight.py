@@ -0,0 +1,113 @@
+import asyncio
+import os
+import threading
+from collections import Counter
+from typing import Any, Awaitable, Callable
+
+# SINGLEFLIGHT=0 runs every call on its own, even when an identical one is in flight
+SINGLEFLIGHT_ENABLED = os.getenv("SINGLEFLIGHT", "1") == "1"
+
+class _Call:
+    """One in-flight call that later identical calls attach to."""
+
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+    def wait(self) -> Any:
+        """The leader's result (re-raising its exception); None when it gave up without one."""
+        self.event.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls: the first caller for a key (the
+    leader) does the work, callers arriving while it runs wait and receive the
+    same result. Nothing is kept once the call lands; caching is the caller's job.
+    Sync callers share calls across threads, async callers within their event loop.
+    """
+
+    def __init__(self, name: str, enabled: bool = SINGLEFLIGHT_ENABLED):
+        self.name = name
+        self.enabled = enabled
+        self._calls: dict[str, _Call] = {}
+        self._tasks: dict[tuple[int, str], asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self._stats: Counter = Counter()
+
+    def _count(self, leader: bool):
+        # Caller holds self._lock
+        self._stats["calls"] += 1
+        self._stats["coalesced"] += int(not leader)
+
+    def join(self, key: str) -> tuple[_Call, bool]:
+        """
+        (call, is_leader) for `key`. The leader must hand its result to
+        finish() whatever happens, or followers wait forever; followers call
+        call.wait(). For callers that cannot use do(), e.g. streams.
+        """
+        with self._lock:
+            call = self._calls.get(key) if self.enabled else None
+            leader = call is None
+            if leader:
+                call = _Call()
+                if self.enabled:
+                    self._calls[key] = call
+            self._count(leader)
+        return call, leader
+
+    def finish(self, key: str, call: _Call, result: Any = None, error: BaseException | None = None):
+        """Land the leader's call: followers get `result` (or `error`); result=None tells them to do the work themselves."""
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.result = result
+        call.error = error
+        call.event.set()
+
+    def do(self, key: str, fn: Callable[..., Any], *args) -> tuple[Any, bool]:
+        """(fn(*args), shared): shared is True when the result came from an identical call already in flight."""
+        call, leader = self.join(key)
+        if not leader:
+            return call.wait(), True
+        try:
+            result = fn(*args)
+        except BaseException as e:
+            self.finish(key, call, error=e)
+            raise
+        self.finish(key, call, result)
+        return result, False
+
+    async def do_async(self, key: str, fn: Callable[..., Awaitable[Any]], *args) -> tuple[Any, bool]:
+        """
+        Async twin of do(). The work runs as its own task, so a caller being
+        cancelled does not cancel it for the others.
+        """
+        loop = asyncio.get_running_loop()
+        task_key = (id(loop), key)
+        with self._lock:
+            task = self._tasks.get(task_key) if self.enabled else None
+            leader = task is None
+            if leader:
+                task = loop.create_task(fn(*args))
+                if self.enabled:
+                    self._tasks[task_key] = task
+                    task.add_done_callback(lambda t: self._forget(task_key, t))
+            self._count(leader)
+        return await asyncio.shield(task), not leader
+
+    def _forget(self, task_key: tuple[int, str], task: asyncio.Task):
+        with self._lock:
+            if self._tasks.get(task_key) is task:
+                del self._tasks[task_key]
+
+    def stats(self) -> dict:
+        """{"calls", "coalesced", "coalesce_rate"}: coalesced calls waited for another caller's result."""
+        with self._lock:
+            calls, coalesced = self._stats["calls"], self._stats["coalesced"]
+        return {"calls": calls, "coalesced": coalesced, "coalesce_rate": coalesced / calls if calls else 0.0}
@@ -0,0 +1,88 @@
+from array import array
+import numpy as np
+
+# Variants are stored as their built-in hash(): only compared within one process,
+# and a collision just adds a candidate that the edit-distance check rejects.
+
+def deletes(word: str, max_distance: int) -> set[str]:
+    """`word` and every string reachable from it by deleting up to max_distance characters."""
+    found = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))} - found
+        found |= frontier
+    return found
+
+def edit_distance(a: str, b: str, max_distance: int) -> int | None:
+    """Optimal string alignment distance (adjacent swaps count once), or None when above max_distance."""
+    if abs(len(a) - len(b)) > max_distance:
+        return None
+    prev2: list[int] = []
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+            row_min = min(row_min, cur[j])
+        if row_min > max_distance:
+            return None
+        prev2, prev = prev, cur
+    return prev[-1] if prev[-1] <= max_distance else None
+
+class SymSpellIndex:
+    """
+    Symmetric-delete spelling index. Every term's delete variants (of its first
+    `prefix_length` characters) are hashed into one sorted int64 array with a
+    parallel array of term ids, so a lookup is a handful of binary searches
+    plus an edit-distance check on the few candidates they return.
+    """
+
+    def __init__(self, terms: list[str], max_distance: int = 2, prefix_length: int = 10):
+        self.terms = terms
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        hashes = array("q")
+        ids = array("i")
+        for i, term in enumerate(terms):
+            variants = deletes(term[:prefix_length], max_distance)
+            hashes.extend([hash(v) for v in variants])
+            ids.extend([i] * len(variants))
+        keys = np.frombuffer(hashes, dtype=np.int64) if hashes else np.zeros(0, dtype=np.int64)
+        order = np.argsort(keys, kind="stable")
+        self._keys = keys[order]
+        self._ids = (np.frombuffer(ids, dtype=np.int32) if ids else np.zeros(0, dtype=np.int32))[order]
+        self._lengths = [len(t) for t in terms]
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the variant arrays (the terms themselves are not counted)."""
+        return self._keys.nbytes + self._ids.nbytes
+
+    def lookup(self, term: str, max_distance: int | None = None) -> tuple[list[int], int]:
+        """Ids of the terms closest to `term` and their distance; ([], -1) when none is within max_distance."""
+        limit = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        keys = np.array([hash(v) for v in deletes(term[:self.prefix_length], limit)], dtype=np.int64)
+        lo = self._keys.searchsorted(keys, side="left")
+        hi = self._keys.searchsorted(keys, side="right")
+        hit = hi > lo
+        candidates = set()
+        for start, end in zip(lo[hit].tolist(), hi[hit].tolist()):
+            candidates.update(self._ids[start:end].tolist())
+        best: list[int] = []
+        best_distance = limit + 1
+        n = len(term)
+        for i in candidates:
+            if abs(self._lengths[i] - n) > limit:
+                continue
+            distance = edit_distance(term, self.terms[i], min(limit, best_distance))
+            if distance is None:
+                continue
+            if distance < best_distance:
+                best, best_distance = [i], distance
+            elif distance == best_distance:
+                best.append(i)
+        return (best, best_distance) if best else ([], -1)
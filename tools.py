@@ -1,20 +1,97 @@
-from dotenv import load_dotenv
-load_dotenv()
-
+import asyncio
 import os
-import requests
+import threading
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Awaitable, Callable
+import config  # noqa: F401
+from cache import TieredCache
+from http_client import DEFAULT_TIMEOUT, get_async_client, get_session, prewarm
+from gazetteer import City
+from singleflight import SingleFlight
+from weather import FORECAST_STEPS, WeatherReport, current_from_openweather, forecast_from_openweather
 
 SERPAPI_KEY = os.getenv("SERPAPI_KEY")
 WEATHER_API_KEY = os.getenv("WEATHER_API_KEY")
+# Open connections to the upstreams at startup (HTTP_PREWARM=1)
+PREWARM_ON_START = os.getenv("HTTP_PREWARM", "0") == "1"
 
-DEFAULT_TIMEOUT = 12  # seconds
-UA = {"User-Agent": "FactualReActAgent/1.2 (+https://example.local)"}
+# How web_search uses its engines (google, bing, wikipedia):
+#   "sequential" - one after another until one returns text (default)
+#   "race"       - all at once, first good result wins
+#   "hedge"      - start the next engine if none has answered after SEARCH_HEDGE_DELAY seconds
+SEARCH_MODE = os.getenv("SEARCH_MODE", "sequential")
+SEARCH_HEDGE_DELAY = float(os.getenv("SEARCH_HEDGE_DELAY", "1.5"))
+# Which engine answered each web_search ("none" when all came back empty)
+SEARCH_WINS: Counter = Counter()
+_search_wins_lock = threading.Lock()
+# Identical searches in flight at the same time share one engine round
+SEARCH_FLIGHTS = SingleFlight("search")
+# Shared by concurrent search engines and parallel weather fetches
+_tool_pool = ThreadPoolExecutor(max_workers=int(os.getenv("SEARCH_WORKERS", "32")), thread_name_prefix="tools")
 
-def _extract_best_answer_from_serpapi(data: dict) -> str:
+# Responses from the upstream APIs, keyed on URL + params (minus API keys).
+# CACHE_PATH="" keeps the cache in memory only.
+TOOL_CACHE = TieredCache(
+    os.getenv("CACHE_PATH", ".cache/tools.sqlite3") or None,
+    max_entries=int(os.getenv("CACHE_MAX_ENTRIES", "2048")),
+    ttls={
+        "weather": float(os.getenv("CACHE_TTL_WEATHER", "600")),
+        "forecast": float(os.getenv("CACHE_TTL_FORECAST", "1800")),
+        "geocode": float(os.getenv("CACHE_TTL_GEOCODE", "2592000")),
+        "serpapi": float(os.getenv("CACHE_TTL_SERPAPI", "21600")),
+        "wiki": float(os.getenv("CACHE_TTL_WIKI", "86400")),
+    },
+)
+
+GEOCODE_URL = "https://api.openweathermap.org/geo/1.0/direct"
+WEATHER_URL = "https://api.openweathermap.org/data/2.5/weather"
+FORECAST_URL = "https://api.openweathermap.org/data/2.5/forecast"
+SERPAPI_URL = "https://serpapi.com/search"
+WIKI_SEARCH_URL = "https://en.wikipedia.org/w/rest.php/v1/search/page"
+WIKI_SUMMARY_URL = "https://en.wikipedia.org/w/rest.php/v1/page/summary/{key}"
+
+def prewarm_connections(connections: int = 1):
     """
-    Aggregate useful text from SerpAPI response in priority order.
-    Returns a concise paragraph-like string.
+    Open keep-alive connections to the configured upstreams before the first request.
     """
+    urls = ["https://en.wikipedia.org/"]
+    if WEATHER_API_KEY:
+        urls.append("https://api.openweathermap.org/")
+    if SERPAPI_KEY:
+        urls.append("https://serpapi.com/")
+    return prewarm(urls, connections)
+
+class SearchResult:
+    """
+    What web_search found. `text` is the flattened paragraph used for LLM
+    composition (str(result) returns it); the structured parts let the agent
+    answer some questions without the LLM. A result with no text is falsy.
+    """
+
+    __slots__ = ("engine", "text", "snippets", "answer_box", "knowledge_graph", "wiki")
+
+    def __init__(self, engine: str = "", text: str = "", snippets: list[str] | None = None,
+                 answer_box: dict | None = None, knowledge_graph: dict | None = None, wiki: dict | None = None):
+        self.engine = engine
+        self.text = text
+        self.snippets = snippets or []
+        self.answer_box = answer_box or {}
+        self.knowledge_graph = knowledge_graph or {}
+        self.wiki = wiki or {}  # Wikipedia page summary: title, description, extract
+
+    def __bool__(self) -> bool:
+        return bool(self.text)
+
+    def __str__(self) -> str:
+        return self.text
+
+    def __repr__(self) -> str:
+        return f"SearchResult(engine={self.engine!r}, text={self.text[:60]!r})"
+
+def _serpapi_snippets(data: dict) -> list[str]:
+    """Useful text from a SerpAPI response in priority order, de-duplicated."""
     parts = []
 
     # Direct answers
@@ -84,57 +161,202 @@ def _extract_best_answer_from_serpapi(data: dict) -> str:
         if p not in seen:
             seen.add(p)
             cleaned.append(p)
+    return cleaned[:8]
+
+def _extract_best_answer_from_serpapi(data: dict) -> str:
+    """
+    Aggregate useful text from SerpAPI response in priority order.
+    Returns a concise paragraph-like string.
+    """
+    return " ".join(_serpapi_snippets(data))
 
-    return " ".join(cleaned[:8]) if cleaned else ""
+def _serpapi_result(engine: str, data: dict) -> SearchResult:
+    snippets = _serpapi_snippets(data)
+    return SearchResult(
+        engine, " ".join(snippets), snippets,
+        answer_box=data.get("answer_box"), knowledge_graph=data.get("knowledge_graph"),
+    )
 
-def get_weather(city: str) -> str:
-    if not WEATHER_API_KEY:
-        return "Sorry, couldn't perform weather lookup (missing WEATHER_API_KEY)."
-    url = "https://api.openweathermap.org/data/2.5/weather"
-    params = {"q": city, "appid": WEATHER_API_KEY, "units": "metric"}
-    try:
-        r = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT, headers=UA)
-    except Exception:
-        return f"Sorry, couldn't find weather for {city}."
-    if r.status_code != 200:
-        return f"Sorry, couldn't find weather for {city}."
-    data = r.json()
+def _cache_key(url: str, params: dict | None) -> str:
+    # API keys stay out of the key so rotating a key doesn't invalidate the cache
+    public = {k: v for k, v in (params or {}).items() if k not in ("appid", "api_key")}
+    return TieredCache.make_key(url, public)
+
+def _fetch_json(url: str, params: dict | None = None) -> dict | None:
+    """Uncached GET; the decoded JSON body, or None on network errors and non-200 responses."""
     try:
-        main = data["weather"][0]["description"].capitalize()
-        temp = data["main"]["temp"]
-        feels = data["main"]["feels_like"]
-        humidity = data["main"]["humidity"]
-        wind = data["wind"]["speed"]
-        return f"In {city}, it's currently {main}, {temp}°C (feels like {feels}°C), humidity {humidity}%, wind {wind} m/s."
+        r = get_session().get(url, params=params, timeout=DEFAULT_TIMEOUT)
+        if r.status_code != 200:
+            return None
+        return r.json()
     except Exception:
-        return f"Sorry, couldn't find weather for {city}."
+        return None
 
-def get_weather_forecast(city: str) -> str:
-    if not WEATHER_API_KEY:
-        return "Sorry, couldn't perform weather lookup (missing WEATHER_API_KEY)."
-    url = "https://api.openweathermap.org/data/2.5/forecast"
-    params = {"q": city, "appid": WEATHER_API_KEY, "units": "metric"}
+async def _fetch_json_async(url: str, params: dict | None = None) -> dict | None:
     try:
-        r = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT, headers=UA)
+        r = await get_async_client().get(url, params=params)
+        if r.status_code != 200:
+            return None
+        return r.json()
     except Exception:
-        return f"Sorry, couldn't find forecast for {city}."
-    if r.status_code != 200:
-        return f"Sorry, couldn't find forecast for {city}."
-    data = r.json()
+        return None
+
+def _get_json(namespace: str, url: str, params: dict | None = None) -> dict | None:
+    """
+    GET url through TOOL_CACHE. Returns the decoded JSON body, or None on
+    network errors and non-200 responses (which are never cached).
+    """
+    key = _cache_key(url, params)
+    data = TOOL_CACHE.get(namespace, key)
+    if data is not None:
+        return data
+    data = _fetch_json(url, params)
+    if data is not None:
+        TOOL_CACHE.set(namespace, key, data)
+    return data
+
+async def _get_json_async(namespace: str, url: str, params: dict | None = None) -> dict | None:
+    key = _cache_key(url, params)
+    data = TOOL_CACHE.get(namespace, key)
+    if data is not None:
+        return data
+    data = await _fetch_json_async(url, params)
+    if data is not None:
+        TOOL_CACHE.set(namespace, key, data)
+    return data
+
+# --- Per-city weather snapshot ---
+# A city is geocoded once; current conditions and the forecast are then fetched
+# by coordinates, in parallel, and kept together in one TOOL_CACHE entry per city.
+# Each part is refreshed on its own window (CACHE_TTL_WEATHER / CACHE_TTL_FORECAST),
+# so "weather in Pune" followed by "will it rain in Pune" costs one round of requests.
+WEATHER_PARTS = {"current": WEATHER_URL, "forecast": FORECAST_URL}
+
+def _weather_fresh_for(part: str) -> float:
+    return TOOL_CACHE.ttls["weather" if part == "current" else "forecast"]
+
+def _city_key(city: "str | City") -> str:
+    # One snapshot per city however it was typed ("Pune", " pune ")
+    key = " ".join(str(city).lower().split())
+    if isinstance(city, City) and city.country:
+        key += "|" + city.country.lower()
+    return key
+
+def _geocode_params(city: "str | City") -> dict:
+    return {"q": " ".join(str(city).lower().split()), "limit": 1, "appid": WEATHER_API_KEY}
+
+def _known_coords(city: "str | City") -> dict | None:
+    # Gazetteer cities come with coordinates and skip the geocoding call
+    if isinstance(city, City) and city.has_coords:
+        return {"lat": city.lat, "lon": city.lon, "name": city.name}
+    return None
+
+def _coords(data) -> dict | None:
+    if not data or not isinstance(data, list):
+        return None
+    place = data[0]
     try:
-        forecasts = []
-        for f in data.get("list", [])[:5]:
-            dt = f.get("dt_txt", "")
-            main = f["weather"][0]["description"].capitalize()
-            temp = f["main"]["temp"]
-            forecasts.append(f"{dt}: {main}, {temp}°C")
-        return f"Forecast for {city}:\n" + "\n".join(forecasts) if forecasts else f"Sorry, couldn't find forecast for {city}."
-    except Exception:
-        return f"Sorry, couldn't find forecast for {city}."
+        return {"lat": place["lat"], "lon": place["lon"], "name": place.get("name", "")}
+    except (KeyError, TypeError):
+        return None
 
-def _serpapi_request(query: str, engine: str = "google") -> dict:
-    url = "https://serpapi.com/search"
-    params = {
+def _coord_params(coords: dict) -> dict:
+    return {"lat": coords["lat"], "lon": coords["lon"], "appid": WEATHER_API_KEY, "units": "metric"}
+
+def _stale_parts(snapshot: dict, now: float) -> list[str]:
+    return [
+        part for part in WEATHER_PARTS
+        if snapshot.get(part) is None or now - snapshot[f"{part}_at"] >= _weather_fresh_for(part)
+    ]
+
+def _store_parts(key: str, snapshot: dict, fetched: dict, now: float) -> dict:
+    for part, data in fetched.items():
+        if data is None:
+            # A failed refresh never serves data past its window
+            snapshot.pop(part, None)
+        else:
+            if part == "forecast" and isinstance(data, dict):
+                # Only the steps a report shows are kept
+                data = {"list": data.get("list", [])[:FORECAST_STEPS]}
+            snapshot[part] = data
+            snapshot[f"{part}_at"] = now
+    TOOL_CACHE.set("weather_snapshot", key, snapshot, ttl=max(_weather_fresh_for(p) for p in WEATHER_PARTS))
+    return snapshot
+
+def _weather_snapshot(city: "str | City") -> dict | None:
+    """{"coords", "current", "forecast", "<part>_at"} for a city, or None when it can't be geocoded."""
+    key = _city_key(city)
+    # Copied: the memory tier hands out the stored dict itself
+    snapshot = dict(TOOL_CACHE.get("weather_snapshot", key) or {})
+    if "coords" not in snapshot:
+        coords = _known_coords(city) or _coords(_get_json("geocode", GEOCODE_URL, _geocode_params(city)))
+        if coords is None:
+            return None
+        snapshot = {"coords": coords}
+    now = time.time()
+    stale = _stale_parts(snapshot, now)
+    if not stale:
+        return snapshot
+    params = _coord_params(snapshot["coords"])
+    futures = {part: _tool_pool.submit(_fetch_json, WEATHER_PARTS[part], params) for part in stale}
+    return _store_parts(key, snapshot, {part: fut.result() for part, fut in futures.items()}, now)
+
+async def _weather_snapshot_async(city: "str | City") -> dict | None:
+    key = _city_key(city)
+    # Copied: the memory tier hands out the stored dict itself
+    snapshot = dict(TOOL_CACHE.get("weather_snapshot", key) or {})
+    if "coords" not in snapshot:
+        coords = _known_coords(city) or _coords(await _get_json_async("geocode", GEOCODE_URL, _geocode_params(city)))
+        if coords is None:
+            return None
+        snapshot = {"coords": coords}
+    now = time.time()
+    stale = _stale_parts(snapshot, now)
+    if not stale:
+        return snapshot
+    params = _coord_params(snapshot["coords"])
+    results = await asyncio.gather(*(_fetch_json_async(WEATHER_PARTS[part], params) for part in stale))
+    return _store_parts(key, snapshot, dict(zip(stale, results)), now)
+
+def _current_report(city: str, snapshot: dict | None) -> WeatherReport:
+    current = current_from_openweather(snapshot["current"]) if snapshot and snapshot.get("current") else None
+    if current is None:
+        return WeatherReport(city, error=f"Sorry, couldn't find weather for {city}.")
+    return WeatherReport(city, current=current)
+
+def _forecast_report(city: str, snapshot: dict | None) -> WeatherReport:
+    forecast = forecast_from_openweather(snapshot["forecast"]) if snapshot and snapshot.get("forecast") else ()
+    if not forecast:
+        return WeatherReport(city, error=f"Sorry, couldn't find forecast for {city}.")
+    return WeatherReport(city, forecast=forecast)
+
+def _missing_key_report(city: str) -> WeatherReport:
+    return WeatherReport(city, error="Sorry, couldn't perform weather lookup (missing WEATHER_API_KEY).")
+
+def get_weather(city: "str | City") -> WeatherReport:
+    """Current conditions for a city name or gazetteer City; str(report) is the answer text."""
+    if not WEATHER_API_KEY:
+        return _missing_key_report(str(city))
+    return _current_report(str(city), _weather_snapshot(city))
+
+async def get_weather_async(city: "str | City") -> WeatherReport:
+    if not WEATHER_API_KEY:
+        return _missing_key_report(str(city))
+    return _current_report(str(city), await _weather_snapshot_async(city))
+
+def get_weather_forecast(city: "str | City") -> WeatherReport:
+    """The next FORECAST_STEPS forecast steps for a city name or gazetteer City."""
+    if not WEATHER_API_KEY:
+        return _missing_key_report(str(city))
+    return _forecast_report(str(city), _weather_snapshot(city))
+
+async def get_weather_forecast_async(city: "str | City") -> WeatherReport:
+    if not WEATHER_API_KEY:
+        return _missing_key_report(str(city))
+    return _forecast_report(str(city), await _weather_snapshot_async(city))
+
+def _serpapi_params(query: str, engine: str) -> dict:
+    return {
         "q": query,
         "api_key": SERPAPI_KEY,
         "engine": engine,
@@ -142,13 +364,53 @@ def _serpapi_request(query: str, engine: str = "google") -> dict:
         "gl": "us",
         "num": "10"
     }
+
+def _serpapi_request(query: str, engine: str = "google") -> dict:
+    return _get_json("serpapi", SERPAPI_URL, _serpapi_params(query, engine)) or {}
+
+async def _serpapi_request_async(query: str, engine: str = "google") -> dict:
+    return await _get_json_async("serpapi", SERPAPI_URL, _serpapi_params(query, engine)) or {}
+
+def _wiki_summary_text(j: dict) -> str:
+    title = j.get("title") or ""
+    desc = j.get("description") or ""
+    extract = j.get("extract") or ""
+    if title and desc:
+        return f"{title} — {desc}. {extract}".strip()
+    return (extract or "").strip()
+
+def _wiki_page_key(s_data: dict) -> str | None:
+    pages = s_data.get("pages", [])
+    if not pages:
+        return None
+    return pages[0].get("key") or None
+
+def _wiki_result(j: dict | None) -> SearchResult:
+    if not j:
+        return SearchResult("wikipedia")
+    text = _wiki_summary_text(j)
+    wiki = {k: j.get(k) or "" for k in ("title", "description", "extract")}
+    return SearchResult("wikipedia", text, [text] if text else [], wiki=wiki)
+
+def _wiki_lookup(query: str) -> SearchResult:
     try:
-        r = requests.get(url, params=params, timeout=DEFAULT_TIMEOUT, headers=UA)
-        if r.status_code != 200:
-            return {}
-        return r.json()
+        s_data = _get_json("wiki", WIKI_SEARCH_URL, {"q": query, "limit": 1})
+        key = _wiki_page_key(s_data) if s_data else None
+        if not key:
+            return SearchResult("wikipedia")
+        return _wiki_result(_get_json("wiki", WIKI_SUMMARY_URL.format(key=key)))
     except Exception:
-        return {}
+        return SearchResult("wikipedia")
+
+async def _wiki_lookup_async(query: str) -> SearchResult:
+    try:
+        s_data = await _get_json_async("wiki", WIKI_SEARCH_URL, {"q": query, "limit": 1})
+        key = _wiki_page_key(s_data) if s_data else None
+        if not key:
+            return SearchResult("wikipedia")
+        return _wiki_result(await _get_json_async("wiki", WIKI_SUMMARY_URL.format(key=key)))
+    except Exception:
+        return SearchResult("wikipedia")
 
 def wiki_search(query: str) -> str:
     """
@@ -157,53 +419,157 @@ def wiki_search(query: str) -> str:
     2) Fetch its summary text.
     Returns a concise paragraph-like text or empty string if nothing found.
     """
+    return _wiki_lookup(query).text
+
+async def wiki_search_async(query: str) -> str:
+    return (await _wiki_lookup_async(query)).text
+
+def _serpapi_search(query: str, engine: str) -> SearchResult:
+    data = _serpapi_request(query, engine=engine)
+    return _serpapi_result(engine, data) if data else SearchResult(engine)
+
+async def _serpapi_search_async(query: str, engine: str) -> SearchResult:
+    data = await _serpapi_request_async(query, engine=engine)
+    return _serpapi_result(engine, data) if data else SearchResult(engine)
+
+def _search_engines() -> list[tuple[str, Callable[[str], SearchResult]]]:
+    engines = []
+    if SERPAPI_KEY:
+        engines.append(("google", lambda q: _serpapi_search(q, "google")))
+        engines.append(("bing", lambda q: _serpapi_search(q, "bing")))
+    engines.append(("wikipedia", _wiki_lookup))
+    return engines
+
+def _search_engines_async() -> list[tuple[str, Callable[[str], Awaitable[SearchResult]]]]:
+    engines = []
+    if SERPAPI_KEY:
+        engines.append(("google", lambda q: _serpapi_search_async(q, "google")))
+        engines.append(("bing", lambda q: _serpapi_search_async(q, "bing")))
+    engines.append(("wikipedia", _wiki_lookup_async))
+    return engines
+
+def _search_delay() -> float | None:
+    """Seconds between engine launches: None = sequential, 0 = race."""
+    if SEARCH_MODE == "race":
+        return 0.0
+    if SEARCH_MODE == "hedge":
+        return SEARCH_HEDGE_DELAY
+    return None
+
+def _record_search_win(engine: str):
+    with _search_wins_lock:
+        SEARCH_WINS[engine or "none"] += 1
+
+def _first_good_result(query: str, engines: list, delay: float | None) -> tuple[str, SearchResult | None]:
+    """
+    Run engines in order, launching the next one after `delay` seconds without
+    a usable answer (or as soon as all running engines came back empty).
+    Returns (engine, result) of the first result with text, or ("", None).
+    Engines that have not started are cancelled; sync HTTP calls already in
+    flight cannot be interrupted and finish in the background.
+    """
+    if delay is None:
+        for name, fn in engines:
+            result = fn(query)
+            if result:
+                return name, result
+        return "", None
+
+    pending = {}
+    queue = list(engines)
+
+    def launch():
+        name, fn = queue.pop(0)
+        pending[_tool_pool.submit(fn, query)] = name
+
+    launch()
+    while queue and delay <= 0:
+        launch()
     try:
-        s_url = "https://en.wikipedia.org/w/rest.php/v1/search/page"
-        s_params = {"q": query, "limit": 1}
-        s_res = requests.get(s_url, params=s_params, timeout=DEFAULT_TIMEOUT, headers=UA)
-        if s_res.status_code != 200:
-            return ""
-        s_data = s_res.json()
-        pages = s_data.get("pages", [])
-        if not pages:
-            return ""
-        key = pages[0].get("key")
-        if not key:
-            return ""
-        sum_url = f"https://en.wikipedia.org/w/rest.php/v1/page/summary/{key}"
-        sum_res = requests.get(sum_url, timeout=DEFAULT_TIMEOUT, headers=UA)
-        if sum_res.status_code != 200:
-            return ""
-        j = sum_res.json()
-        title = j.get("title") or ""
-        desc = j.get("description") or ""
-        extract = j.get("extract") or ""
-        if title and desc:
-            return f"{title} — {desc}. {extract}".strip()
-        return (extract or "").strip()
-    except Exception:
-        return ""
+        while pending:
+            done, _ = wait(pending, timeout=delay if queue else None, return_when=FIRST_COMPLETED)
+            if not done:
+                launch()
+                continue
+            for fut in done:
+                name = pending.pop(fut)
+                try:
+                    result = fut.result()
+                except Exception:
+                    result = None
+                if result:
+                    return name, result
+            if not pending and queue:
+                launch()
+        return "", None
+    finally:
+        for fut in pending:
+            fut.cancel()
+
+async def _first_good_result_async(query: str, engines: list, delay: float | None) -> tuple[str, SearchResult | None]:
+    if delay is None:
+        for name, fn in engines:
+            result = await fn(query)
+            if result:
+                return name, result
+        return "", None
+
+    pending = {}
+    queue = list(engines)
+
+    def launch():
+        name, fn = queue.pop(0)
+        pending[asyncio.ensure_future(fn(query))] = name
+
+    launch()
+    while queue and delay <= 0:
+        launch()
+    try:
+        while pending:
+            done, _ = await asyncio.wait(pending, timeout=delay if queue else None, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                launch()
+                continue
+            for task in done:
+                name = pending.pop(task)
+                result = None if task.exception() else task.result()
+                if result:
+                    return name, result
+            if not pending and queue:
+                launch()
+        return "", None
+    finally:
+        for task in pending:
+            task.cancel()
 
-def web_search(query: str) -> str:
+def web_search(query: str) -> SearchResult:
     """
-    Query SerpAPI (if available) and extract a concise paragraph-like text for LLM composition.
+    Query SerpAPI (if available) and collect a concise paragraph-like text for LLM composition,
+    plus the answer box / knowledge graph / Wikipedia summary it came from.
     Fallback to Bing engine via SerpAPI; if both fail or key missing, fallback to Wikipedia REST.
+    With SEARCH_MODE=race/hedge the engines run concurrently and the first good result wins.
+    A search for the same query that is already in flight is joined instead of repeated.
+    Returns an empty (falsy) SearchResult when nothing was found.
     """
     cleaned_q = query.strip(" '\"<>")
+    result, _ = SEARCH_FLIGHTS.do(_search_key(cleaned_q), _search, cleaned_q)
+    return result
 
-    # Prefer SerpAPI if key exists
-    if SERPAPI_KEY:
-        data = _serpapi_request(cleaned_q, engine="google")
-        text = _extract_best_answer_from_serpapi(data) if data else ""
-        if not text:
-            data_bing = _serpapi_request(cleaned_q, engine="bing")
-            text = _extract_best_answer_from_serpapi(data_bing) if data_bing else ""
-        if text:
-            return text
-
-    # Fallback to Wikipedia
-    wiki_text = wiki_search(cleaned_q)
-    if wiki_text:
-        return wiki_text
-
-    return "Sorry, couldn't find an answer."
\ No newline at end of file
+async def web_search_async(query: str) -> SearchResult:
+    cleaned_q = query.strip(" '\"<>")
+    result, _ = await SEARCH_FLIGHTS.do_async(_search_key(cleaned_q), _search_async, cleaned_q)
+    return result
+
+def _search_key(query: str) -> str:
+    # Engines ignore case and spacing, so "IPL 2023 winner" and "ipl  2023 winner" share a search
+    return " ".join(query.lower().split())
+
+def _search(query: str) -> SearchResult:
+    engine, result = _first_good_result(query, _search_engines(), _search_delay())
+    _record_search_win(engine)
+    return result or SearchResult()
+
+async def _search_async(query: str) -> SearchResult:
+    engine, result = await _first_good_result_async(query, _search_engines_async(), _search_delay())
+    _record_search_win(engine)
+    return result or SearchResult()
@@ -0,0 +1,143 @@
+import os
+from datetime import datetime, timezone
+from routing import forecast_mentions
+
+# Forecast steps kept per report (OpenWeather steps are 3 hours apart)
+FORECAST_STEPS = 5
+# Sustained wind (m/s) from which a forecast step counts as windy (Beaufort 5, "fresh breeze")
+WINDY_SPEED = float(os.getenv("WINDY_SPEED", "8"))
+
+def _num(value: float) -> str:
+    # 25.0 -> "25", 25.31 -> "25.31"
+    return f"{value:g}"
+
+def _conditions(code: int, description: str, wind: float) -> frozenset:
+    """Weather intents ("rain", "sunny", ...) an OpenWeather condition satisfies."""
+    kinds = set(forecast_mentions(description))
+    group = code // 100
+    if group in (2, 3, 5):  # thunderstorm, drizzle, rain
+        kinds.add("rain")
+    elif group == 6:
+        kinds.add("snow")
+    elif code == 800:
+        kinds.add("sunny")
+    elif 801 <= code <= 804:
+        kinds.add("cloudy")
+    if wind >= WINDY_SPEED:
+        kinds.add("windy")
+    return frozenset(kinds)
+
+class CurrentConditions:
+    __slots__ = ("description", "temp", "feels_like", "humidity", "wind", "conditions")
+
+    def __init__(self, description: str, temp: float, feels_like: float, humidity: float, wind: float,
+                 code: int = 0):
+        self.description = description
+        self.temp = temp
+        self.feels_like = feels_like
+        self.humidity = humidity
+        self.wind = wind
+        self.conditions = _conditions(code, description, wind)
+
+class ForecastEntry:
+    __slots__ = ("time", "description", "temp", "wind", "conditions")
+
+    def __init__(self, time: datetime, description: str, temp: float, wind: float = 0.0, code: int = 0):
+        self.time = time
+        self.description = description
+        self.temp = temp
+        self.wind = wind
+        self.conditions = _conditions(code, description, wind)
+
+    @property
+    def label(self) -> str:
+        # Same form as OpenWeather's dt_txt (UTC)
+        return self.time.strftime("%Y-%m-%d %H:%M:%S")
+
+class WeatherReport:
+    """
+    Weather for one city: current conditions and/or the next forecast steps.
+    A failed lookup is a report with `error` set (and is falsy). Answers, intent
+    checks and the UI's Markdown are all rendered from this record.
+    """
+
+    __slots__ = ("city", "current", "forecast", "error")
+
+    def __init__(self, city: str, current: CurrentConditions | None = None,
+                 forecast: tuple[ForecastEntry, ...] = (), error: str | None = None):
+        self.city = city
+        self.current = current
+        self.forecast = forecast
+        self.error = error
+
+    def __bool__(self) -> bool:
+        return self.error is None
+
+    def __str__(self) -> str:
+        return self.to_text()
+
+    def expects(self, intent: str) -> bool:
+        """True when any forecast step (or, without a forecast, the current weather) matches the intent."""
+        if self.forecast:
+            return any(intent in entry.conditions for entry in self.forecast)
+        return self.current is not None and intent in self.current.conditions
+
+    def current_text(self) -> str:
+        c = self.current
+        return (
+            f"In {self.city}, it's currently {c.description.capitalize()}, {_num(c.temp)}°C "
+            f"(feels like {_num(c.feels_like)}°C), humidity {_num(c.humidity)}%, wind {_num(c.wind)} m/s."
+        )
+
+    def forecast_text(self) -> str:
+        lines = [f"{e.label}: {e.description.capitalize()}, {_num(e.temp)}°C" for e in self.forecast]
+        return f"Forecast for {self.city}:\n" + "\n".join(lines)
+
+    def to_text(self) -> str:
+        if self.error:
+            return self.error
+        parts = []
+        if self.current:
+            parts.append(self.current_text())
+        if self.forecast:
+            parts.append(self.forecast_text())
+        return "\n".join(parts)
+
+    def to_markdown(self) -> str:
+        if self.error:
+            return self.error
+        parts = []
+        if self.current:
+            c = self.current
+            parts.append(
+                f"In {self.city}, it's currently {c.description.capitalize()}, **{_num(c.temp)}°C** "
+                f"(feels like {_num(c.feels_like)}°C), humidity {_num(c.humidity)}%, wind {_num(c.wind)} m/s."
+            )
+        if self.forecast:
+            lines = [f"- `{e.label}`: {e.description.capitalize()}, **{_num(e.temp)}°C**" for e in self.forecast]
+            parts.append(f"**Forecast for {self.city}:**\n" + "\n".join(lines))
+        return "\n\n".join(parts)
+
+# --- OpenWeather responses ---
+def current_from_openweather(data: dict) -> CurrentConditions | None:
+    try:
+        weather = data["weather"][0]
+        return CurrentConditions(
+            weather["description"], data["main"]["temp"], data["main"]["feels_like"],
+            data["main"]["humidity"], data["wind"]["speed"], weather.get("id", 0),
+        )
+    except (KeyError, IndexError, TypeError):
+        return None
+
+def forecast_from_openweather(data: dict, steps: int = FORECAST_STEPS) -> tuple[ForecastEntry, ...]:
+    entries = []
+    for item in data.get("list", [])[:steps]:
+        try:
+            weather = item["weather"][0]
+            entries.append(ForecastEntry(
+                datetime.fromtimestamp(item["dt"], timezone.utc), weather["description"],
+                item["main"]["temp"], (item.get("wind") or {}).get("speed", 0.0), weather.get("id", 0),
+            ))
+        except (KeyError, IndexError, TypeError):
+            continue
+    return tuple(entries)